@@ -0,0 +1,242 @@
+// --------------------------------------------------
+// Clientside Figure Rendering
+// --------------------------------------------------
+// Browser-side versions of create_delta_card, create_bullet and create_box
+// from pages/overview.py (see fast_figures.py for the plain-dict specs). The
+// server ships only the numeric payload; the figures are built here.
+
+// Python's round(): halves go to the nearest even number
+function roundHalfEven(value) {
+  const floor = Math.floor(value);
+  const diff = value - floor;
+  if (diff > 0.5) return floor + 1;
+  if (diff < 0.5) return floor;
+  return floor % 2 === 0 ? floor : floor + 1;
+}
+
+function createDeltaCard(val, ref, format, suffix, direction, height, template) {
+  // Map height labels to numeric values, default to "medium"
+  const heightMap = { small: 40, medium: 60, big: 80 };
+  const heightUsed = heightMap[(height || "medium").toLowerCase()] || 60;
+
+  const deltaColor =
+    direction === "outgo"
+      ? { increasing: { color: "red" }, decreasing: { color: "green" } }
+      : { increasing: { color: "green" }, decreasing: { color: "red" } };
+
+  return {
+    data: [
+      {
+        type: "indicator",
+        mode: "number+delta",
+        value: val,
+        number: {
+          valueformat: format,
+          suffix: suffix,
+          font: {
+            color: "rgb(213, 215, 224)",
+            weight: "bold",
+            family: "Arial, sans-serif",
+          },
+        },
+        delta: {
+          position: "right",
+          reference: ref,
+          valueformat: format,
+          suffix: suffix,
+          ...deltaColor,
+        },
+        domain: { x: [0, 1], y: [0, 1] },
+      },
+    ],
+    layout: {
+      template: template,
+      margin: { l: 0, r: 0, t: 10, b: 10 },
+      paper_bgcolor: "rgb(35, 36, 72)",
+      plot_bgcolor: "rgb(35, 36, 72)",
+      height: heightUsed,
+    },
+  };
+}
+
+function createBullet(value, template) {
+  const currentValue = value * 100;
+  const maxValue = roundHalfEven(currentValue) + 15;
+
+  return {
+    data: [
+      {
+        type: "indicator",
+        mode: "gauge",
+        value: currentValue,
+        gauge: {
+          shape: "bullet",
+          axis: {
+            range: [null, maxValue],
+            visible: true,
+            tickcolor: "rgb(213, 215, 224)",
+            tickfont: { color: "rgb(213, 215, 224)" },
+          },
+          bar: { color: "rgb(0, 127, 61)", thickness: 0.5 },
+          threshold: {
+            line: { color: "orange", width: 3 },
+            thickness: 0.75,
+            value: 90,
+          },
+          steps: [
+            { range: [0, 80], color: "rgba(174, 177, 210, 0.85)" },
+            { range: [80, 100], color: "rgb(255, 230, 83)" },
+            { range: [100, maxValue], color: "rgb(255, 83, 83)" },
+          ],
+        },
+        domain: { x: [0, 1], y: [0.4, 1] },
+        number: {
+          suffix: "%",
+          font: { size: 34, color: "white", family: "Arial", weight: "bold" },
+        },
+        delta: {
+          reference: 90,
+          suffix: "%",
+          valueformat: ".1f",
+          position: "right",
+          increasing: { color: "red" },
+          decreasing: { color: "green" },
+          font: { size: 16 },
+        },
+      },
+    ],
+    layout: {
+      template: template,
+      paper_bgcolor: "rgb(35, 36, 72)",
+      plot_bgcolor: "rgb(35, 36, 72)",
+      margin: { l: 60, r: 60, t: 15, b: 0 },
+      height: 100,
+    },
+  };
+}
+
+// The rank text comes with the value, ranked on the server against the full
+// distribution (see build_product_metrics)
+function createBox(val, rank, distribution, template) {
+  const missing = val === null || Number.isNaN(val);
+
+  // Vertical lines for 1st quartile, median, and 3rd quartile
+  const shapes = distribution.quartiles.map((x) => ({
+    type: "line",
+    x0: x,
+    y0: -0.5,
+    x1: x,
+    y1: 0.5,
+    line: { color: "rgb(174, 177, 210)", width: 2 },
+  }));
+
+  return {
+    data: [
+      {
+        type: "scatter",
+        x: distribution.points,
+        y: distribution.jitter,
+        mode: "markers",
+        marker: { color: "lightgreen", size: 5 },
+        name: "Historical Value",
+      },
+      {
+        type: "scatter",
+        x: [missing ? null : val],
+        y: [0],
+        mode: "markers",
+        marker: { color: "red", size: 10 },
+        name: "Current Value",
+      },
+    ],
+    layout: {
+      template: template,
+      shapes: shapes,
+      annotations: [
+        {
+          x: missing ? null : val * 1.2,
+          y: 0.5,
+          text: rank,
+          showarrow: true,
+          arrowhead: 2,
+          ax: 0,
+          ay: -10,
+          font: { color: "rgb(174, 177, 210)", size: 12 },
+        },
+        {
+          x: 0,
+          y: 0,
+          xref: "paper",
+          xanchor: "right",
+          text: distribution.label,
+          showarrow: false,
+          font: { color: "rgb(174, 177, 210)", size: 10 },
+        },
+      ],
+      xaxis: { visible: false },
+      yaxis: { visible: false },
+      showlegend: false,
+      margin: { l: 100, r: 100, t: 0, b: 0 },
+      height: 60,
+      paper_bgcolor: "rgb(35, 36, 72)",
+      plot_bgcolor: "rgb(35, 36, 72)",
+    },
+  };
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  overview: {
+    // Resolve a dropdown change from the preloaded product-metrics store
+    // (see build_product_metrics), without a server round-trip
+    selectProduct: function (product, store) {
+      if (!product || !store || !(product in store.products)) {
+        throw window.dash_clientside.PreventUpdate;
+      }
+      // Values as in PRODUCT_METRIC_COLUMNS: current and previous value of
+      // each card, the bullet gauge value, each box plot's change, then each
+      // box plot's rank text
+      const values = store.products[product];
+      const nCards = store.cards.length;
+      const nBoxes = store.distributions.length;
+      const changes = values.slice(2 * nCards + 1, 2 * nCards + 1 + nBoxes);
+      const ranks = values.slice(2 * nCards + 1 + nBoxes);
+      const cards = store.cards.map((spec, i) => [
+        values[2 * i],
+        values[2 * i + 1],
+        ...spec,
+      ]);
+      return [
+        `${product} Product:`,
+        {
+          cards: cards,
+          bullet: values[2 * nCards],
+          boxes: changes.map((val, i) => [val, ranks[i]]),
+        },
+      ];
+    },
+
+    // Payload as in selected_card_payload: delta card arguments in output
+    // order, followed by the bullet gauge value
+    renderCards: function (payload, template) {
+      if (!payload) {
+        throw window.dash_clientside.PreventUpdate;
+      }
+      const cards = payload.cards.map(([val, ref, format, suffix, direction]) =>
+        createDeltaCard(val, ref, format, suffix, direction, "medium", template)
+      );
+      cards.push(createBullet(payload.bullet, template));
+      return cards;
+    },
+
+    // Box plots of the selected product's changes, against the
+    // distributions shipped once per data version in the metrics store
+    renderBoxes: function (payload, store, template) {
+      if (!payload || !store || !store.distributions) {
+        throw window.dash_clientside.PreventUpdate;
+      }
+      return payload.boxes.map(([val, rank], i) =>
+        createBox(val, rank, store.distributions[i], template)
+      );
+    },
+  },
+});
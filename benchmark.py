@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+import config
+import dashboard  # noqa: F401  (registers the pages)
+import data_store
+import fast_figures
+from generate_data import experience_sheets
+import projection
+import sql_store
+from figure_cache import figure_cache
+from pages import overview, product
+
+# --------------------------------------------------
+# Callback Microbenchmarks
+# --------------------------------------------------
+# Times the dashboard's data lookups, callbacks and figure factories against
+# synthetic data at several product counts, and reports p50/p95 latency, peak
+# traced memory and serialized payload size per function. Results are saved
+# as JSON so runs can be compared between releases.
+#
+# python benchmark.py [--scales 4 100 1000 10000] [--output results.json]
+
+SCALES = [4, 100, 1_000, 10_000]
+
+
+def benchmark_cases(version):
+    # Function name -> (callable, product -> call arguments)
+    def record(name):
+        return data_store.metric_records[name]
+
+    def box_args(name):
+        return (record(name)["delta_lossRatio_scaled"], "lossRatio")
+
+    def card_args(name):
+        data = record(name)
+        return (
+            data["current_lossRatio_scaled"],
+            data["prev_lossRatio_scaled"],
+            ".1f",
+            "%",
+            "outgo",
+        )
+
+    def fan_args(name):
+        return (projection.project_loss_ratio(name, version),)
+
+    def click(name):
+        return ({"points": [{"text": name}]},)
+
+    return {
+        "get_data": (overview.get_data, lambda name: (name,)),
+        "period_slice": (
+            data_store.periods.slice,
+            lambda name: (data_store.period_columns[0],),
+        ),
+        "update_data": (overview.update_data, lambda name: (name,)),
+        "update_table": (product.update_table, click),
+        "create_figure": (product.create_figure, lambda name: ()),
+        "create_fan": (overview.create_fan, fan_args),
+        "create_box": (overview.create_box, box_args),
+        "create_delta_card": (overview.create_delta_card, card_args),
+        "create_bullet": (
+            overview.create_bullet,
+            lambda name: (record(name)["current_lossRatio"],),
+        ),
+        # Plain-dict builders used on the hot path
+        "fast_create_figure": (
+            fast_figures.create_figure,
+            lambda name: (data_store.data_chart,),
+        ),
+        "fast_create_fan": (fast_figures.create_fan, fan_args),
+        "fast_create_box": (fast_figures.create_box, box_args),
+        "fast_create_delta_card": (fast_figures.create_delta_card, card_args),
+        "fast_create_bullet": (
+            fast_figures.create_bullet,
+            lambda name: (record(name)["current_lossRatio"],),
+        ),
+        # get_data, update_table and create_figure lookups through the SQLite
+        # backend, to compare with the pandas path above
+        "sqlite_get_data": (sql_store.metric_record, lambda name: (name,)),
+        "sqlite_update_table": (sql_store.current_record, lambda name: (name,)),
+        "sqlite_create_figure": (
+            lambda: fast_figures.create_figure(sql_store.chart()),
+            lambda name: (),
+        ),
+    }
+
+
+def payload_bytes(result):
+    try:
+        return len(to_json_plotly(result))
+    except (TypeError, ValueError):
+        return None
+
+
+def time_calls(function, arguments, names, repeat, max_seconds):
+    timings = []
+    result = None
+    started = time.perf_counter()
+
+    for name in names[:repeat]:
+        args = arguments(name)
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+
+        # Slow cases stop early, after at least three samples
+        if len(timings) >= 3 and time.perf_counter() - started > max_seconds:
+            break
+
+    return np.array(timings), result
+
+
+def peak_memory(function, arguments, names):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for name in names[:3]:
+        function(*arguments(name))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def reset_caches():
+    # Drops cached results; the figure cache keeps its hit/miss counts
+    figure_cache.retain(lambda key: False)
+    overview.build_all_panel.cache_clear()
+    overview.build_product_metrics.cache_clear()
+    projection.project_loss_ratio.cache_clear()
+    projection.portfolio_model.cache_clear()
+
+
+def run_scale(n_products, repeat, max_seconds, seed):
+    version = f"bench-{n_products}-{seed}"
+    data_store.load_data(experience_sheets(n_products, seed=seed), version)
+    figure_cache.clear()
+    reset_caches()
+
+    # The SQLite database of this version is rebuilt for every run
+    path = sql_store.database_path(version)
+    if os.path.exists(path):
+        os.remove(path)
+    start = time.perf_counter()
+    sql_store.ensure_database()
+    build_seconds = time.perf_counter() - start
+
+    # Products visited in a fixed random order, so repeat visits hit caches
+    # at a realistic rate
+    rng = np.random.default_rng(seed)
+    products = list(data_store.metric_records)
+    names = list(rng.choice(products, size=repeat))
+
+    results = [
+        {
+            "products": n_products,
+            "function": "sqlite_build",
+            "runs": 1,
+            "p50_ms": build_seconds * 1000,
+            "p95_ms": build_seconds * 1000,
+            "peak_memory_bytes": 0,
+            "payload_bytes": None,
+        }
+    ]
+    for function_name, (function, arguments) in benchmark_cases(version).items():
+        # Peak memory of cold calls, then timings from cold caches again
+        reset_caches()
+        peak = peak_memory(function, arguments, names)
+        reset_caches()
+
+        timings, result = time_calls(function, arguments, names, repeat, max_seconds)
+        results.append(
+            {
+                "products": n_products,
+                "function": function_name,
+                "runs": len(timings),
+                "p50_ms": float(np.percentile(timings, 50) * 1000),
+                "p95_ms": float(np.percentile(timings, 95) * 1000),
+                "peak_memory_bytes": peak,
+                "payload_bytes": payload_bytes(result),
+            }
+        )
+
+    return results, figure_cache.stats()
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dashboard callbacks")
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--max-seconds", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fast_figures": config.FAST_FIGURES,
+            "clientside_cards": config.CLIENTSIDE_CARDS,
+            "query_backend": config.QUERY_BACKEND,
+        },
+        "results": [],
+        "figure_cache": {},
+    }
+
+    print(
+        f"{'products':>8}  {'function':<24}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'peak KiB':>10}{'bytes':>10}"
+    )
+    for n_products in args.scales:
+        results, cache_stats = run_scale(
+            n_products, args.repeat, args.max_seconds, args.seed
+        )
+        report["results"].extend(results)
+        report["figure_cache"][str(n_products)] = cache_stats
+
+        for row in results:
+            print(
+                f"{row['products']:>8}  {row['function']:<24}"
+                f"{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}"
+                f"{row['peak_memory_bytes'] / 1024:>10.1f}"
+                f"{row['payload_bytes'] or 0:>10}"
+            )
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results saved to {args.output}")
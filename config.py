@@ -0,0 +1,105 @@
+import os
+
+# --------------------------------------------------
+# Dashboard Configuration
+# --------------------------------------------------
+# Every setting can be overridden with an environment variable of the same
+# name prefixed with "DASHBOARD_", e.g. DASHBOARD_DATA_FILE=q2.xlsx
+
+# Source workbook holding the experience study sheets
+DATA_FILE = os.environ.get("DASHBOARD_DATA_FILE", "data.xlsx")
+
+# Folder for the columnar (Parquet) copies of parsed workbooks
+CACHE_DIR = os.environ.get("DASHBOARD_CACHE_DIR", ".cache")
+
+# Maximum number of rendered figures kept by the LRU figure cache
+FIGURE_CACHE_SIZE = int(os.environ.get("DASHBOARD_FIGURE_CACHE_SIZE", 512))
+
+# Build hot-path figures as plain dicts, skipping plotly property validation
+FAST_FIGURES = os.environ.get("DASHBOARD_FAST_FIGURES", "1") == "1"
+
+# Render the selected product's delta cards and bullet gauge in the browser
+# (assets/main.js) from a numeric payload instead of shipping figures
+CLIENTSIDE_CARDS = os.environ.get("DASHBOARD_CLIENTSIDE_CARDS", "1") == "1"
+
+# Monte Carlo projection behind the fan chart: scenarios per product and the
+# base seed of the per-product random streams
+FAN_SIMULATIONS = int(os.environ.get("DASHBOARD_FAN_SIMULATIONS", 10_000))
+FAN_SEED = int(os.environ.get("DASHBOARD_FAN_SEED", 42))
+
+# Projections above this many scenarios are simulated in chunks of this size
+# and summarized by a quantile sketch, which bounds peak memory at roughly
+# FAN_CHUNK_SIZE * 8 bytes per array whatever the scenario count
+FAN_CHUNK_SIZE = int(os.environ.get("DASHBOARD_FAN_CHUNK_SIZE", 1_000_000))
+FAN_SKETCH_COMPRESSION = int(os.environ.get("DASHBOARD_FAN_SKETCH_COMPRESSION", 200))
+
+# Project the "All" portfolio jointly from correlated product draws, with the
+# estimated correlation matrix shrunk towards the identity by this weight
+PORTFOLIO_CORRELATED = os.environ.get("DASHBOARD_PORTFOLIO_CORRELATED", "1") == "1"
+PORTFOLIO_SHRINKAGE = float(os.environ.get("DASHBOARD_PORTFOLIO_SHRINKAGE", 0.5))
+
+# Worker processes used by the batch projection runner (default: all cores)
+PROJECTION_WORKERS = int(
+    os.environ.get("DASHBOARD_PROJECTION_WORKERS", os.cpu_count() or 1)
+)
+
+# Peer-distribution box plots draw at most this many historical points
+BOX_MAX_POINTS = int(os.environ.get("DASHBOARD_BOX_MAX_POINTS", 200))
+
+# Callback instrumentation: observations kept by each rolling histogram, and
+# the addresses or networks /metrics answers (comma separated, empty for
+# any). Behind a reverse proxy every client arrives from the proxy's
+# address, so proxied requests are refused while the list is set; scrape
+# the app's own port instead
+METRICS_WINDOW = int(os.environ.get("DASHBOARD_METRICS_WINDOW", 1_000))
+METRICS_ALLOW = [
+    address.strip()
+    for address in os.environ.get("DASHBOARD_METRICS_ALLOW", "127.0.0.1,::1").split(",")
+    if address.strip()
+]
+
+# Hot reload: seconds between checks of DATA_FILE for changes (0 disables),
+# and between browser checks for a newly loaded data version
+RELOAD_INTERVAL = float(os.environ.get("DASHBOARD_RELOAD_INTERVAL", 5))
+VERSION_POLL_INTERVAL = float(os.environ.get("DASHBOARD_VERSION_POLL_INTERVAL", 30))
+
+# Extract ingestion: rows read per chunk, and worker processes aggregating
+# partitions (default: all cores)
+INGEST_CHUNK_SIZE = int(os.environ.get("DASHBOARD_INGEST_CHUNK_SIZE", 1_000_000))
+INGEST_WORKERS = int(os.environ.get("DASHBOARD_INGEST_WORKERS", os.cpu_count() or 1))
+
+# Storage backend behind get_data, update_table and create_figure: "pandas"
+# (in-memory DataFrames) or "sqlite" (indexed database file per data version)
+QUERY_BACKEND = os.environ.get("DASHBOARD_QUERY_BACKEND", "pandas")
+
+# Customer profiles behind the spider chart (spyder_chart.py): an XLSX
+# workbook, or a Parquet file for tables beyond Excel's row limit
+CUSTOMER_FILE = os.environ.get("DASHBOARD_CUSTOMER_FILE", "data_2.xlsx")
+
+# Spider chart axes: 0 uses the fixed ranges in spyder_chart.CUSTOM_RANGES,
+# otherwise each axis spans the [q, 1 - q] quantiles of the data. Up to
+# SPIDER_TRACE_LIMIT customers get a filled trace each; larger tables are
+# drawn as a single WebGL trace.
+SPIDER_RANGE_QUANTILE = float(os.environ.get("DASHBOARD_SPIDER_RANGE_QUANTILE", 0))
+SPIDER_TRACE_LIMIT = int(os.environ.get("DASHBOARD_SPIDER_TRACE_LIMIT", 50))
+
+# Spider chart drawing: "profiles" (one loop per customer), "clusters"
+# (mini-batch k-means centroids, SPIDER_CLUSTERS of them) or "bands"
+# (percentile envelopes)
+SPIDER_MODE = os.environ.get("DASHBOARD_SPIDER_MODE", "profiles")
+SPIDER_CLUSTERS = int(os.environ.get("DASHBOARD_SPIDER_CLUSTERS", 8))
+
+# Customer page: profiles per table page (and per page of the spider chart)
+CUSTOMER_PAGE_SIZE = int(os.environ.get("DASHBOARD_CUSTOMER_PAGE_SIZE", 25))
+
+# Product line graph: above LINE_GRAPH_WEBGL_THRESHOLD product traces the
+# lines are drawn with WebGL; LINE_GRAPH_TOP_N > 0 draws only the products
+# with the highest latest loss ratio and folds the rest into a P10-P90 band
+LINE_GRAPH_WEBGL_THRESHOLD = int(
+    os.environ.get("DASHBOARD_LINE_GRAPH_WEBGL_THRESHOLD", 200)
+)
+LINE_GRAPH_TOP_N = int(os.environ.get("DASHBOARD_LINE_GRAPH_TOP_N", 0))
+
+# Highlight the clicked product's line by patching the styles of the clicked
+# and previously clicked traces, instead of re-sending the figure
+LINE_GRAPH_HIGHLIGHT = os.environ.get("DASHBOARD_LINE_GRAPH_HIGHLIGHT", "1") == "1"
@@ -0,0 +1,5 @@
+import os
+
+# Tests import the dashboard modules from the repository root and read the
+# workbooks relative to it, as the dashboard does when started from here
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,136 @@
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import config
+import spyder_chart
+import workbook_cache
+
+# --------------------------------------------------
+# Indexed Customer Table
+# --------------------------------------------------
+# The customer profile table behind pages/customer.py, held once per content
+# version of the customer workbook. Rows are sorted by age, so an age band is
+# a binary search to one contiguous slice, and the other filters only scan
+# that slice. Callbacks get row positions back and send the browser a single
+# page of them, or an aggregate of the whole selection. Profile clusters are
+# fitted once per table; a selection only regroups the fitted assignments.
+
+DATE_COLUMN = "Date"
+
+# Most Rider code -> label, for display
+RIDER_LABELS = {code: label for label, code in spyder_chart.RIDER_CODES.items()}
+
+
+class CustomerTable:
+    def __init__(self, customers, version):
+        self.version = version
+        self.customers = customers.sort_values("Age", kind="stable").reset_index(
+            drop=True
+        )
+
+        # Filter columns as plain arrays
+        self.age = self.customers["Age"].to_numpy(dtype="float64")
+        self.gender = self.customers["Gender"].to_numpy(dtype="float64")
+        self.rider = self.customers["Most Rider"].to_numpy(dtype="float64")
+        self.dates = self._dates(self.customers[DATE_COLUMN])
+
+        # Without dates, the column's study period labels ("Previous",
+        # "Current") are filtered on instead
+        self.labels = (
+            None
+            if self.has_dates
+            else self.customers[DATE_COLUMN].astype(str).to_numpy()
+        )
+
+        self._clusters = None  # (ProfileClusters, profile values, labels)
+        self._clusters_lock = threading.Lock()
+
+    @staticmethod
+    def _dates(column):
+        # Profile labels that are not dates ("Previous", "Current") leave the
+        # date filter without effect
+        if pd.api.types.is_datetime64_any_dtype(column):
+            return column.to_numpy()
+        return pd.to_datetime(column, errors="coerce", format="mixed").to_numpy()
+
+    @property
+    def has_dates(self):
+        return not np.isnat(self.dates).all()
+
+    @property
+    def period_labels(self):
+        # Distinct labels, in order of first appearance
+        return [] if self.labels is None else list(dict.fromkeys(self.labels))
+
+    @property
+    def age_range(self):
+        return int(np.floor(np.nanmin(self.age))), int(np.ceil(np.nanmax(self.age)))
+
+    def __len__(self):
+        return len(self.customers)
+
+    def filter(self, dates=None, riders=None, gender=None, ages=None, periods=None):
+        # Row positions matching every given filter, in age order. dates,
+        # gender and ages are inclusive (low, high) pairs, riders a list of
+        # Most Rider codes and periods a list of Date labels (for tables
+        # without dates).
+        start, stop = 0, len(self)
+        if ages is not None:
+            start = np.searchsorted(self.age, ages[0], side="left")
+            stop = np.searchsorted(self.age, ages[1], side="right")
+
+        mask = np.ones(stop - start, dtype=bool)
+        if riders:
+            mask &= np.isin(self.rider[start:stop], riders)
+        if gender is not None:
+            values = self.gender[start:stop]
+            mask &= (values >= gender[0]) & (values <= gender[1])
+        if dates is not None and self.has_dates:
+            values = self.dates[start:stop]
+            if dates[0] is not None:
+                mask &= values >= np.datetime64(dates[0])
+            if dates[1] is not None:
+                mask &= values <= np.datetime64(dates[1])
+        if periods and not self.has_dates:
+            mask &= np.isin(self.labels[start:stop], periods)
+
+        return start + np.flatnonzero(mask)
+
+    def rows(self, positions):
+        return self.customers.iloc[positions]
+
+    def clusters(self, positions):
+        # Clusters of a selection: mini-batch k-means is fitted over the
+        # whole table the first time, and a filter change only reads the
+        # selected rows' assignments
+        with self._clusters_lock:
+            if self._clusters is None:
+                _, _, values = spyder_chart.profile_values(self.customers)
+                model = spyder_chart.summarize(self.customers, mode="clusters")
+                self._clusters = model, values, model.predict(values)
+
+        model, values, labels = self._clusters
+        return model.selection(values[positions], labels[positions])
+
+    def page(self, positions, page, page_size):
+        # Table records of one page of the selection
+        rows = self.rows(positions[page * page_size : (page + 1) * page_size])
+        rows = rows.assign(**{"Most Rider": rows["Most Rider"].map(RIDER_LABELS)})
+        if pd.api.types.is_datetime64_any_dtype(rows[DATE_COLUMN]):
+            rows[DATE_COLUMN] = rows[DATE_COLUMN].dt.strftime("%Y-%m-%d")
+        return rows.to_dict("records")
+
+
+@lru_cache(maxsize=2)
+def _load(version, path):
+    return CustomerTable(spyder_chart.load_customers(path), version)
+
+
+def customer_table(path=config.CUSTOMER_FILE):
+    # The manifest makes the version check a stat() of an unchanged workbook
+    # (or Parquet file)
+    version = workbook_cache.workbook_digest(path)[:16]
+    return _load(version, path)
@@ -1,14 +1,60 @@
-from dash import Dash, dcc, html
+from dash import Dash, dcc, html, Input, Output, State
+from dash.exceptions import PreventUpdate
 import dash
 
+import config
+import data_store
+import hot_reload
+import instrumentation
+from projection_runner import refresh_projections
+
 # Initialize the Dash app (only once, in the main app file)
 app = Dash(__name__, use_pages=True)
 
-# Main layout for the app
-app.layout = html.Div(
-    [dash.page_container]  # This will render the correct page based on the URL
+
+# Main layout for the app, rebuilt on every page load so a new visit starts
+# on the data version currently loaded
+def serve_layout():
+    return html.Div(
+        [
+            # Data version, drives every data-dependent callback
+            dcc.Store(id="data-version", data=data_store.data_version),
+            # Browser check for a reloaded workbook (see hot_reload.py)
+            dcc.Interval(
+                id="data-refresh",
+                interval=config.VERSION_POLL_INTERVAL * 1000,
+                disabled=config.RELOAD_INTERVAL <= 0,
+            ),
+            dash.page_container,  # This will render the correct page based on the URL
+        ]
+    )
+
+
+app.layout = serve_layout
+
+
+@dash.callback(
+    Output("data-version", "data"),
+    [Input("data-refresh", "n_intervals")],
+    [State("data-version", "data")],
+    prevent_initial_call=True,
 )
+def refresh_data_version(n_intervals, version):
+    # Only push a version when the server has swapped in new data
+    if version == data_store.data_version:
+        raise PreventUpdate
+    return data_store.data_version
+
+
+# Pin each request to the data snapshot it started on, and watch the
+# workbook for changes
+hot_reload.install(app)
+
+# Per-callback latency, payload and cache metrics, served on /metrics
+instrumentation.install(app)
 
 # Run the app
 if __name__ == "__main__":
+    # Project every product up front so no request has to simulate
+    refresh_projections()
     app.run_server(debug=True)
@@ -0,0 +1,210 @@
+import contextvars
+import hashlib
+from contextlib import contextmanager
+from functools import lru_cache
+from types import SimpleNamespace
+
+import timeseries
+import workbook_cache
+from distributions import build_distributions
+from metrics import compute_metrics
+from timeseries import PeriodStore
+
+# --------------------------------------------------
+# Shared Experience Data Store
+# --------------------------------------------------
+# The experience workbook is read through workbook_cache.py at import, and
+# everything derived from it is kept in data snapshots.
+
+
+def index_records(frame, key="Product"):
+    # Map each product to its full row, so callbacks resolve a product with a
+    # single dict lookup instead of a boolean-mask scan of the sheet
+    return dict(zip(frame[key], frame.to_dict("records")))
+
+
+# --------------------------------------------------
+# Data Snapshots
+# --------------------------------------------------
+# Everything derived from one version of the data lives in a snapshot, and
+# the module's data attributes (data_store.metrics, data_store.data_chart,
+# ...) resolve against it. A reload builds a new snapshot off to the side and
+# publishes it with a single reference swap. Each request is pinned to the
+# snapshot current when it started, so in-flight callbacks finish on the data
+# they began with.
+
+_current = None
+_pinned = contextvars.ContextVar("data_snapshot", default=None)
+
+
+def current():
+    return _pinned.get() or _current
+
+
+def published():
+    # The snapshot new requests are pinned to, whatever this context is
+    return _current
+
+
+def __getattr__(name):
+    try:
+        return getattr(current(), name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+
+def pin(snapshot=None):
+    # Pin this thread / context to a snapshot; returns the token for unpin
+    return _pinned.set(snapshot or _current)
+
+
+def unpin(token):
+    _pinned.reset(token)
+
+
+@contextmanager
+def pinned(snapshot=None):
+    token = pin(snapshot)
+    try:
+        yield
+    finally:
+        unpin(token)
+
+
+def publish(snapshot):
+    global _current
+    _current = snapshot
+
+
+# --------------------------------------------------
+# Data Processing
+# --------------------------------------------------
+
+
+def build_snapshot(sheets, version):
+    snapshot = SimpleNamespace(
+        data_version=version,
+        data_table_curr=sheets["Sheet2"],
+        data_table_prev=sheets["Sheet3"],
+        periods=PeriodStore(),
+    )
+
+    # Long-format store of every study period (the Sheet1 columns after
+    # Product, oldest first): each period's loss ratio, plus the other figures
+    # of the previous (Sheet3) and current (Sheet2) periods. Loss ratios are
+    # kept as reported in Sheet1.
+    history, periods = sheets["Sheet1"], snapshot.periods
+    for period in history.columns.drop("Product"):
+        periods.append(
+            period, history[["Product", period]].rename(columns={period: "Loss Ratio"})
+        )
+    for period, data_table in zip(
+        periods.periods[-2:][::-1], [snapshot.data_table_curr, snapshot.data_table_prev]
+    ):
+        periods.append(period, data_table.drop(columns="Loss Ratio"))
+
+    derive_data(snapshot)
+    return snapshot
+
+
+def load_data(sheets, version):
+    # (Re)build every derived structure from the raw sheets and make it the
+    # current snapshot, so loading new sheets (e.g. synthetic data for
+    # benchmarks) takes effect everywhere
+    publish(build_snapshot(sheets, version))
+
+
+def append_period(period, data_table):
+    # Snapshot of the current data plus a new study quarter (a Sheet2-style
+    # table, e.g. one of ingest.period_tables) after the loaded ones: it
+    # becomes the current period and the current one the previous period.
+    # The history already in the store is shared, not rebuilt. Published
+    # through hot_reload.append_data, like a reloaded workbook.
+    base = current()
+    if period in base.periods.periods:
+        raise ValueError(f"Study period {period!r} is already loaded")
+
+    snapshot = SimpleNamespace(
+        # New version, so every version-keyed cache moves on
+        data_version=hashlib.sha256(
+            f"{base.data_version}+{period}".encode()
+        ).hexdigest()[:16],
+        data_table_curr=data_table,
+        data_table_prev=base.data_table_curr,
+        periods=base.periods.copy(),
+    )
+    snapshot.periods.append(period, data_table)
+
+    derive_data(snapshot)
+    # The loaded periods keep their labels ("Current" is no longer the last)
+    snapshot.period_labels.update(base.period_labels)
+    return snapshot
+
+
+def derive_data(snapshot):
+    periods = snapshot.periods
+
+    # Loss ratio per product (rows) and study period (columns), in %
+    snapshot.period_columns = list(periods.periods)
+    # Display labels, with the quarter of the "Current" period read off the
+    # data rather than configured
+    snapshot.period_labels = timeseries.period_labels(
+        snapshot.period_columns, timeseries.study_quarter(snapshot.data_table_curr)
+    )
+    data_chart = (periods.panel("Loss Ratio") * 100).reset_index()
+    data_chart.columns.name = None
+    snapshot.data_chart = data_chart
+
+    # Product -> row index, built once at load
+    snapshot.records_curr = index_records(snapshot.data_table_curr)
+    snapshot.records_chart = index_records(data_chart)
+
+    # Derived metrics for every product, read one row per callback
+    metrics = compute_metrics(snapshot.data_table_curr, snapshot.data_table_prev)
+    snapshot.metrics = metrics
+    snapshot.metric_records = index_records(metrics.reset_index())
+
+    # Peer distributions behind the box plots
+    snapshot.distributions = build_distributions(periods)
+
+
+def study_period(period=None):
+    # The given study period if the current data has it, otherwise the
+    # latest one (e.g. for a browser still showing a period a reload dropped)
+    columns = current().period_columns
+    return period if period in columns else columns[-1]
+
+
+def period_metrics(period=None):
+    # Metric records of a study period against the period before it; the
+    # current period's are the ones precomputed at load
+    snapshot = current()
+    if period is None or period == snapshot.period_columns[-1]:
+        return snapshot.metric_records
+    return _period_metric_records(snapshot.data_version, period)
+
+
+def clear_caches():
+    # Drop metric records cached for earlier data versions
+    _period_metric_records.cache_clear()
+
+
+@lru_cache(maxsize=64)
+def _period_metric_records(version, period):
+    return index_records(period_metrics_table(current().periods, period).reset_index())
+
+
+def period_metrics_table(periods, period):
+    # Metrics table of one study period of a PeriodStore. Repricing details
+    # are only shown for the current period.
+    current_period = periods.slice(period).drop(
+        columns="Mths Since Reprice", errors="ignore"
+    )
+    previous = periods.previous(period)
+    previous = current_period.iloc[:0] if previous is None else periods.slice(previous)
+
+    return compute_metrics(current_period.reset_index(), previous.reset_index())
+
+
+# Data read
+load_data(*workbook_cache.read_workbook())
@@ -0,0 +1,116 @@
+import numpy as np
+
+import config
+
+# --------------------------------------------------
+# Peer Distribution Store
+# --------------------------------------------------
+# Historical period-over-period changes of each box plot metric across the
+# products (not the "All" portfolio total) and every pair of consecutive study
+# periods that reports it, built once at load. Each metric keeps a sorted
+# array, so a value's rank is a binary search, plus its quartiles and a fixed
+# display sample with fixed jitter, so box plots are deterministic and
+# cacheable.
+
+PORTFOLIO = "All"
+
+# Box plot metric -> metrics table column holding its change
+BOX_METRICS = {
+    "lossRatio": "delta_lossRatio_scaled",
+    "claim": "pct_delta_claim_scaled",
+    "cont": "pct_delta_cont_scaled",
+    "num_lives": "pct_delta_num_lives_scaled",
+    "avg_claim": "pct_delta_avg_claim_scaled",
+}
+
+# Box plot metric -> period store metric its history is taken from. Loss
+# ratio changes are in % points; the others are relative changes in %, so
+# products of any size share one scale.
+HISTORY_METRICS = {
+    "lossRatio": "Loss Ratio",
+    "claim": "Incurred Claim",
+    "cont": "Net Contribution",
+    "num_lives": "Number of Lives",
+    "avg_claim": "Average Claim Size",
+}
+
+# Label drawn on each box plot
+BOX_LABELS = {
+    metric: "Change (pts)" if metric == "lossRatio" else "Change (%)"
+    for metric in BOX_METRICS
+}
+
+# Spread of the fixed vertical jitter of the strip points
+JITTER_SCALE = 0.1
+
+
+def summarize(values, label, max_points=config.BOX_MAX_POINTS):
+    values = np.sort(values[np.isfinite(values)])
+    if values.size == 0:
+        values = np.zeros(1)
+
+    # Evenly spaced order statistics keep the strip's shape at bounded size
+    if values.size > max_points:
+        points = values[np.linspace(0, values.size - 1, max_points).astype(int)]
+    else:
+        points = values
+
+    # Fixed jitter per point, the same on every render
+    jitter = np.random.default_rng(0).normal(0, JITTER_SCALE, points.size)
+
+    return {
+        "label": label,
+        "values": values,
+        "quartiles": np.quantile(values, [0.25, 0.5, 0.75]).tolist(),
+        "points": points,
+        "jitter": jitter,
+    }
+
+
+def period_changes(panel, relative):
+    # Changes between consecutive periods of a product x period panel; pairs
+    # with a missing figure come out NaN and are left out by summarize
+    values = panel.drop(index=PORTFOLIO, errors="ignore").to_numpy(dtype="float64")
+    previous, current = values[:, :-1], values[:, 1:]
+    if not relative:
+        return ((current - previous) * 100).ravel()
+    return (
+        np.divide(
+            current - previous,
+            previous,
+            out=np.full_like(current, np.nan),
+            where=previous != 0,
+        )
+        * 100
+    ).ravel()
+
+
+def build_distributions(periods):
+    # From every period of a PeriodStore; metrics it does not hold get an
+    # empty distribution
+    changes = {}
+    for metric, source in HISTORY_METRICS.items():
+        if source in periods.metrics:
+            changes[metric] = period_changes(
+                periods.panel(source), relative=metric != "lossRatio"
+            )
+        else:
+            changes[metric] = np.array([])
+
+    return {
+        metric: summarize(values, BOX_LABELS[metric])
+        for metric, values in changes.items()
+    }
+
+
+def rank_percentile(distribution, val):
+    # Share of historical changes strictly below the value (NaN when the
+    # value is missing, e.g. a study period without that metric)
+    if np.isnan(val):
+        return np.nan
+    values = distribution["values"]
+    return np.searchsorted(values, val, side="left") / values.size * 100
+
+
+def rank_text(rank_percentile, suffix):
+    return "n/a" if np.isnan(rank_percentile) else f"{rank_percentile:.0f}{suffix}"
@@ -0,0 +1,434 @@
+import base64
+
+import numpy as np
+import plotly.io as pio
+
+import config
+import data_store
+from distributions import rank_percentile as rank_percentile_of, rank_text
+
+# --------------------------------------------------
+# Fast Figure Builders
+# --------------------------------------------------
+# Plain-dict versions of the dashboard's figure factories. They emit the same
+# figure spec as the go.Figure factories in pages/overview.py and
+# pages/product.py, but skip plotly's property validation, which dominates
+# callback time on the indicator-heavy overview page. Dash serializes the
+# returned dicts directly.
+
+# Templates are resolved once; every figure shares the same (read-only) dict
+DEFAULT_TEMPLATE = pio.templates[pio.templates.default].to_plotly_json()
+WHITE_TEMPLATE = pio.templates["plotly_white"].to_plotly_json()
+
+
+def _typed_array(values):
+    # Same base64 typed-array encoding plotly applies to numpy data
+    values = np.ascontiguousarray(values, dtype="float64")
+    return {"dtype": "f8", "bdata": base64.b64encode(values.tobytes()).decode()}
+
+
+def create_delta_card(val, ref, format, suffix, direction="income", height="Medium"):
+
+    # Map height labels to numeric values
+    height_map = {"small": 40, "medium": 60, "big": 80}
+
+    # Use the height map to get the correct size, default to "medium"
+    height_used = height_map.get(height.lower(), 60)
+
+    if direction == "outgo":
+        delta_color = {
+            "increasing": {"color": "red"},  # Red for increase in outgo
+            "decreasing": {"color": "green"},  # Green for decrease in outgo
+        }
+    else:  # Default is "income"
+        delta_color = {
+            "increasing": {"color": "green"},  # Green for increase in income
+            "decreasing": {"color": "red"},  # Red for decrease in income
+        }
+
+    return {
+        "data": [
+            {
+                "type": "indicator",
+                "mode": "number+delta",
+                "value": val,
+                "number": {
+                    "valueformat": format,
+                    "suffix": suffix,
+                    "font": {
+                        "color": "rgb(213, 215, 224)",
+                        "weight": "bold",
+                        "family": "Arial, sans-serif",
+                    },
+                },
+                "delta": {
+                    "position": "right",
+                    "reference": ref,
+                    "valueformat": format,
+                    "suffix": suffix,
+                    **delta_color,
+                },
+                "domain": {"x": [0, 1], "y": [0, 1]},
+            }
+        ],
+        "layout": {
+            "template": DEFAULT_TEMPLATE,
+            "margin": {"l": 0, "r": 0, "t": 10, "b": 10},
+            "paper_bgcolor": "rgb(35, 36, 72)",
+            "plot_bgcolor": "rgb(35, 36, 72)",
+            "height": height_used,
+        },
+    }
+
+
+def create_bullet(value):
+    current_value = value * 100
+    max_value = round(current_value, 0) + 15
+
+    return {
+        "data": [
+            {
+                "type": "indicator",
+                "mode": "gauge",
+                "value": current_value,
+                "gauge": {
+                    "shape": "bullet",
+                    "axis": {
+                        "range": [None, max_value],
+                        "visible": True,
+                        "tickcolor": "rgb(213, 215, 224)",
+                        "tickfont": {"color": "rgb(213, 215, 224)"},
+                    },
+                    "bar": {"color": "rgb(0, 127, 61)", "thickness": 0.5},
+                    "threshold": {
+                        "line": {"color": "orange", "width": 3},
+                        "thickness": 0.75,
+                        "value": 90,
+                    },
+                    "steps": [
+                        {"range": [0, 80], "color": "rgba(174, 177, 210, 0.85)"},
+                        {"range": [80, 100], "color": "rgb(255, 230, 83)"},
+                        {"range": [100, max_value], "color": "rgb(255, 83, 83)"},
+                    ],
+                },
+                "domain": {"x": [0, 1], "y": [0.4, 1]},
+                "number": {
+                    "suffix": "%",
+                    "font": {
+                        "size": 34,
+                        "color": "white",
+                        "family": "Arial",
+                        "weight": "bold",
+                    },
+                },
+                "delta": {
+                    "reference": 90,
+                    "suffix": "%",
+                    "valueformat": ".1f",
+                    "position": "right",
+                    "increasing": {"color": "red"},
+                    "decreasing": {"color": "green"},
+                    "font": {"size": 16},
+                },
+            }
+        ],
+        "layout": {
+            "template": DEFAULT_TEMPLATE,
+            "paper_bgcolor": "rgb(35, 36, 72)",
+            "plot_bgcolor": "rgb(35, 36, 72)",
+            "margin": {"l": 60, "r": 60, "t": 15, "b": 0},
+            "height": 100,
+        },
+    }
+
+
+def create_box(val, metric):
+    # Historical changes of this metric, with fixed jitter and quartiles
+    distribution = data_store.distributions[metric]
+    data = distribution["points"]
+    jitter = distribution["jitter"]
+    rank_percentile = rank_percentile_of(distribution, val)
+    q1, median, q3 = distribution["quartiles"]
+
+    # Vertical lines for 1st quartile, median, and 3rd quartile
+    shapes = [
+        {
+            "type": "line",
+            "x0": x,
+            "y0": -0.5,
+            "x1": x,
+            "y1": 0.5,
+            "line": {"color": "rgb(174, 177, 210)", "width": 2},
+        }
+        for x in (q1, median, q3)
+    ]
+
+    fig = {
+        "data": [
+            {
+                "type": "scatter",
+                "x": _typed_array(data),
+                "y": _typed_array(jitter),
+                "mode": "markers",
+                "marker": {"color": "lightgreen", "size": 5},
+                "name": "Historical Value",
+            },
+            {
+                "type": "scatter",
+                "x": [val],
+                "y": [0],
+                "mode": "markers",
+                "marker": {"color": "red", "size": 10},
+                "name": "Current Value",
+            },
+        ],
+        "layout": {
+            "template": DEFAULT_TEMPLATE,
+            "shapes": shapes,
+            "annotations": [
+                {
+                    "x": val * 1.2,
+                    "y": 0.5,
+                    "text": rank_text(rank_percentile, "th%"),
+                    "showarrow": True,
+                    "arrowhead": 2,
+                    "ax": 0,
+                    "ay": -10,
+                    "font": {"color": "rgb(174, 177, 210)", "size": 12},
+                },
+                {
+                    "x": 0,
+                    "y": 0,
+                    "xref": "paper",
+                    "xanchor": "right",
+                    "text": distribution["label"],
+                    "showarrow": False,
+                    "font": {"color": "rgb(174, 177, 210)", "size": 10},
+                },
+            ],
+            "xaxis": {"visible": False},
+            "yaxis": {"visible": False},
+            "showlegend": False,
+            "margin": {"l": 100, "r": 100, "t": 0, "b": 0},
+            "height": 60,
+            "paper_bgcolor": "rgb(35, 36, 72)",
+            "plot_bgcolor": "rgb(35, 36, 72)",
+        },
+    }
+
+    return fig, rank_text(rank_percentile, "th percentile")
+
+
+def create_fan(projection):
+    x_values = projection["periods"]
+    y_values = projection["history"]
+    last_period, last_value = x_values[-1], y_values[-1]
+
+    # Only the history until the projection batch is published
+    pending = projection["bands"] is None
+    bands = [] if pending else projection["bands"]
+    projected = [] if pending else ["Projected"]
+
+    # Actual line chart, including the mean of the projected values
+    traces = [
+        {
+            "type": "scatter",
+            "x": x_values + projected,
+            "y": y_values + [projection["mean"]] * len(projected),
+            "mode": "lines+markers",
+            "name": "Mean Loss Ratio",
+            "line": {"color": "rgb(0, 127, 61)", "width": 2.5},
+            "marker": {"color": "rgb(0, 127, 61)", "size": 5},
+            "showlegend": False,
+        }
+    ]
+
+    # Confidence intervals as shaded areas
+    colors = [
+        "rgb(255, 83, 83)",
+        "rgba(255, 230, 83,0.6)",
+        "rgba(255, 230, 83,0.6)",
+        "rgb(255, 83, 83)",
+    ]
+
+    for i in range(len(bands) - 1):
+        traces.append(
+            {
+                "type": "scatter",
+                "x": [last_period, "Projected", "Projected", last_period],
+                "y": [last_value, bands[i], bands[i + 1], last_value],
+                "fill": "toself",
+                "fillcolor": colors[i],
+                "line": {"color": "rgba(255,255,255,0)"},
+                "showlegend": False,
+            }
+        )
+
+    layout = {
+        "template": DEFAULT_TEMPLATE,
+        "paper_bgcolor": "rgb(35, 36, 72)",
+        "plot_bgcolor": "rgb(35, 36, 72)",
+        "yaxis": {
+            "range": [
+                min(50, *y_values, *bands[:1]),
+                max(130, *y_values, *bands[-1:]),
+            ],
+            "showgrid": False,
+        },
+        "xaxis": {"showgrid": False, "tickfont": {"weight": "bold"}},
+        "font": {"family": "Arial, sans-serif", "color": "rgb(213, 215, 224)"},
+        "margin": {"l": 15, "r": 15, "t": 20, "b": 10},
+        "height": 250,
+    }
+    if pending:
+        layout["annotations"] = [
+            {
+                "text": "Projection pending",
+                "xref": "paper",
+                "yref": "paper",
+                "x": 0.5,
+                "y": 0.5,
+                "showarrow": False,
+            }
+        ]
+
+    return {"data": traces, "layout": layout}
+
+
+def split_products(rows, top_n=None):
+    # Products drawn as their own traces (the top_n by latest loss ratio, or
+    # all of them; LINE_GRAPH_TOP_N by default) and the rest, folded into a
+    # percentile band; both keep the load order
+    if top_n is None:
+        top_n = config.LINE_GRAPH_TOP_N
+    products = rows.drop(index="All")
+    if top_n <= 0 or len(products) <= top_n:
+        return products, None
+
+    order = np.argsort(-products.iloc[:, -1].to_numpy(), kind="stable")
+    return products.iloc[np.sort(order[:top_n])], products.iloc[np.sort(order[top_n:])]
+
+
+def line_trace_type(n_traces):
+    # WebGL traces once SVG would be slow to draw and redraw
+    return "scattergl" if n_traces > config.LINE_GRAPH_WEBGL_THRESHOLD else "scatter"
+
+
+# Percentiles of the products folded into the band: lower, middle, upper
+BAND_PERCENTILES = [10, 50, 90]
+
+
+def create_figure(data_chart, selected_products=None):
+    # Study periods are the columns after Product, oldest first
+    periods = [column for column in data_chart.columns if column != "Product"]
+    rows = data_chart.set_index("Product")[periods]
+    products, others = split_products(rows)
+    trace_type = line_trace_type(len(products))
+
+    traces = [
+        # 'All' products, prominent by default
+        {
+            "type": trace_type,
+            "x": periods,
+            "y": rows.loc["All"].to_numpy(),
+            "mode": "lines+markers",
+            "name": "All",
+            "line": {"width": 3},
+            "opacity": 1.0,
+            "text": ["All"] * len(periods),
+            "hoverinfo": "text+y",
+        },
+        # Threshold line at 90%
+        {
+            "type": trace_type,
+            "x": periods,
+            "y": [90] * len(periods),
+            "mode": "lines",
+            "line": {"color": "red", "width": 2, "dash": "dash"},
+            "name": "Threshold (90%)",
+            "opacity": 1.0,
+            "text": ["Threshold (90%)"] * len(periods),
+            "showlegend": False,
+            "hoverinfo": "skip",
+        },
+    ]
+
+    # Each product, initially semi-transparent
+    for product, values in zip(products.index, products.to_numpy()):
+        traces.append(
+            {
+                "type": trace_type,
+                "x": periods,
+                "y": values,
+                "mode": "lines+markers",
+                "name": product,
+                "line": {"width": 2},
+                "opacity": 0.3,
+                "text": [product] * len(periods),
+                "hoverinfo": "text+y",
+            }
+        )
+
+    # Remaining products as a P10-P90 band around their median; the band
+    # takes no hover or clicks, so clicks still resolve to a product
+    if others is not None:
+        lower, middle, upper = np.nanpercentile(
+            others.to_numpy(), BAND_PERCENTILES, axis=0
+        )
+        name = f"Other {len(others):,} products"
+        traces += [
+            {
+                "type": "scatter",
+                "x": periods,
+                "y": lower,
+                "mode": "lines",
+                "line": {"width": 0},
+                "name": name,
+                "legendgroup": "others",
+                "showlegend": False,
+                "hoverinfo": "skip",
+            },
+            {
+                "type": "scatter",
+                "x": periods,
+                "y": upper,
+                "mode": "lines",
+                "line": {"width": 0},
+                "fill": "tonexty",
+                "fillcolor": "rgba(128, 128, 128, 0.3)",
+                "name": f"{name} (P10-P90)",
+                "legendgroup": "others",
+                "hoverinfo": "skip",
+            },
+            {
+                "type": "scatter",
+                "x": periods,
+                "y": middle,
+                "mode": "lines",
+                "line": {"color": "grey", "width": 2, "dash": "dot"},
+                "name": f"{name} (median)",
+                "legendgroup": "others",
+                "hoverinfo": "skip",
+            },
+        ]
+
+    return {
+        "data": traces,
+        "layout": {
+            "template": WHITE_TEMPLATE,
+            "title": {
+                "text": "Loss Ratio Development vs Previous Studies",
+                "font": {"family": "var(--font-family)", "weight": "bold"},
+            },
+            "xaxis": {"title": {"text": "Study Period"}},
+            "yaxis": {"title": {"text": "Loss Ratio (%)"}},
+            "legend": {
+                "orientation": "h",
+                "x": -0.05,
+                "y": 1.05,
+                "xanchor": "left",
+                "yanchor": "bottom",
+            },
+            "font": {"family": "var(--font-family)"},
+        },
+    }
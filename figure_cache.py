@@ -0,0 +1,109 @@
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import plotly.graph_objs as go
+
+import config
+import data_store
+from hot_reload import on_reload
+from instrumentation import count_cache
+
+# --------------------------------------------------
+# LRU Figure Cache
+# --------------------------------------------------
+# Figure factories are pure functions of their arguments and the loaded data,
+# so rendered figures are memoized on (factory, data version, arguments).
+# Each entry is the plain figure dict handed to Dash (which serializes it
+# itself); the least recently used entry is evicted once the cache is full.
+
+
+class FigureCache:
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def retain(self, keep):
+        # Drop every entry whose key does not satisfy keep(key)
+        with self._lock:
+            for key in [key for key in self._entries if not keep(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+figure_cache = FigureCache(config.FIGURE_CACHE_SIZE)
+
+
+@on_reload
+def drop_stale_figures(version):
+    # Figures of earlier data versions can no longer be requested
+    figure_cache.retain(lambda key: key[1] == version)
+
+
+def _plain(result):
+    # Store figures as plain dicts; Dash serializes those without re-walking
+    # the graph_objects property tree
+    if isinstance(result, go.Figure):
+        return result.to_plotly_json()
+    if isinstance(result, tuple):
+        return tuple(_plain(item) for item in result)
+    return result
+
+
+def _cache_key(factory_name, args, kwargs):
+    return (
+        factory_name,
+        data_store.data_version,
+        args,
+        tuple(sorted(kwargs.items())),
+    )
+
+
+def cached_figure(factory):
+    @wraps(factory)
+    def wrapper(*args, **kwargs):
+        key = _cache_key(factory.__name__, args, kwargs)
+
+        figure = figure_cache.get(key)
+        count_cache(figure is not None)
+        if figure is None:
+            figure = figure_cache.put(key, _plain(factory(*args, **kwargs)))
+
+        return figure
+
+    return wrapper
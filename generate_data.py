@@ -0,0 +1,238 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from timeseries import period_labels, quarter_number
+
+# --------------------------------------------------
+# Synthetic Data Generator
+# --------------------------------------------------
+# Builds workbooks with the exact schema the pages expect, at any scale:
+# experience sheets shaped like data.xlsx (Sheet1 loss ratios by period,
+# Sheet2 current and Sheet3 previous period) and customer profiles shaped
+# like data_2.xlsx. Every sheet is also written as Parquet, which is the only
+# output for tables beyond Excel's row limit.
+#
+# python generate_data.py --products 1000 --periods 12 --customers 1000000
+
+# Data rows an Excel sheet can hold (one row is the header)
+EXCEL_MAX_ROWS = 1_048_575
+
+# Customers generated (and written) per chunk, bounding memory
+CUSTOMER_CHUNK_SIZE = 1_000_000
+
+CUSTOMER_RIDERS = np.array(["Medical Rider", "CI Rider"])
+
+
+def study_number(current):
+    # Quarter number of the current period ("23Q1" or "2023Q1")
+    number = quarter_number(current)
+    if number is None:
+        raise ValueError(f"Current period is not a quarter: {current!r}")
+    return number
+
+
+def period_headers(n_periods, current="23Q1", step=4):
+    # Sheet1 headers oldest first, `step` quarters apart, the last one shown
+    # as "Current" (data.xlsx: 21Q1, 22Q1, Current)
+    number = study_number(current)
+
+    headers = []
+    for back in range(n_periods - 1, 0, -1):
+        year, quarter = divmod(number - back * step, 4)
+        headers.append(f"{year % 100:02d}Q{quarter + 1}")
+    return headers + ["Current"]
+
+
+def experience_sheets(n_products, n_periods=3, seed=0, current="23Q1", step=4):
+    rng = np.random.default_rng(seed)
+    periods = period_headers(n_periods, current, step)
+    products = [f"Medi {i:05d}" for i in range(n_products)]
+
+    # Contribution, loss ratio and lives per product (rows) and period (cols)
+    base = rng.uniform(5e5, 3e6, (n_products, 1))
+    growth = rng.uniform(0.97, 1.08, (n_products, n_periods)).cumprod(axis=1)
+    contribution = (base * growth).round()
+    trend = rng.normal(0.02, 0.05, (n_products, n_periods)).cumsum(axis=1)
+    loss_ratio = np.clip(rng.uniform(0.5, 0.9, (n_products, 1)) + trend, 0.2, 1.8)
+    claims = contribution * loss_ratio
+    lives = (contribution / rng.uniform(100, 400, (n_products, 1))).round()
+
+    # "All" is the first row, totalled over products
+    names = ["All"] + products
+    contribution = np.vstack([contribution.sum(axis=0), contribution])
+    claims = np.vstack([claims.sum(axis=0), claims])
+    lives = np.vstack([lives.sum(axis=0), lives])
+    loss_ratio = claims / contribution
+
+    # Repricing: some products were never repriced
+    year, quarter = divmod(study_number(current), 4)
+    study_month = np.datetime64(f"{year}-{quarter * 3 + 3:02d}", "M")
+    months = rng.integers(1, 36, len(names)).astype("float64")
+    months[rng.random(len(names)) < 0.3] = np.nan
+
+    # Month arithmetic on the whole array; each date is the 1st of its month
+    repriced = np.isfinite(months)
+    reprice_date = np.full(len(names), np.datetime64("NaT"), dtype="datetime64[M]")
+    reprice_date[repriced] = study_month - months[repriced].astype("int64")
+    reprice_date = pd.DatetimeIndex(reprice_date.astype("datetime64[ns]"))
+
+    # 3-year cumulative figures cover the periods within the last 12 quarters
+    window = max(1, min(n_periods, 12 // step))
+    cum_contribution = contribution[:, -window:].sum(axis=1)
+    cum_claims = claims[:, -window:].sum(axis=1)
+
+    chart = pd.DataFrame(loss_ratio, columns=periods)
+    chart.insert(0, "Product", names)
+
+    def period_sheet(i):
+        return pd.DataFrame(
+            {
+                "Product": names,
+                "Net Contribution": contribution[:, i],
+                "Incurred Claim": claims[:, i],
+                "Loss Ratio": loss_ratio[:, i],
+                "Number of Lives": lives[:, i],
+                "Average Claim Size": claims[:, i] / lives[:, i],
+                "Last Reprice Date": reprice_date,
+                "Mths Since Reprice": months,
+            }
+        )
+
+    curr = period_sheet(-1)
+    curr.insert(4, "3Yr Cum Net Contribution", cum_contribution)
+    curr.insert(5, "3Yr Cum Incurred Claim", cum_claims)
+    curr.insert(6, "Loss Ratio.1", cum_claims / cum_contribution)
+    prev = period_sheet(-2) if n_periods > 1 else period_sheet(-1)
+
+    return {"Sheet1": chart, "Sheet2": curr, "Sheet3": prev}
+
+
+def customer_chunks(
+    n_customers, periods, seed=0, chunk_size=CUSTOMER_CHUNK_SIZE, study=None
+):
+    # Customer profiles as in data_2.xlsx, yielded chunk by chunk; "Date" is
+    # a day within the study period (quarter) the profile belongs to, with
+    # "Current" resolved as on the dashboard
+    rng = np.random.default_rng([seed, 1])
+    numbers = [
+        quarter_number(label) for label in period_labels(periods, study).values()
+    ]
+    if None in numbers:
+        raise ValueError(f"Customer periods are not all quarters: {periods!r}")
+
+    # First day and length in days of each period's quarter
+    months = np.array([(n // 4 - 1970) * 12 + n % 4 * 3 for n in numbers])
+    first_day = months.astype("datetime64[M]").astype("datetime64[D]")
+    days = ((months + 3).astype("datetime64[M]") - first_day).astype("int64")
+
+    for start in range(0, n_customers, chunk_size):
+        size = min(chunk_size, n_customers - start)
+        period = rng.integers(0, len(numbers), size)
+        offset = (rng.random(size) * days[period]).astype("int64")
+        age = rng.integers(18, 71, size)
+        sum_assured = (rng.lognormal(9.8, 0.5, size) // 1000 * 1000).astype("int64")
+        yield pd.DataFrame(
+            {
+                "Date": first_day[period] + offset,
+                "Age": age,
+                "Gender": rng.integers(0, 2, size).astype("float64"),
+                "Sum Assured": sum_assured,
+                "Contribution": (sum_assured * rng.uniform(0.005, 0.015, size))
+                .round()
+                .astype("int64"),
+                "Term": rng.choice([5, 10, 15, 20], size),
+                "Most Rider": CUSTOMER_RIDERS[rng.integers(0, 2, size)],
+            }
+        )
+
+
+def write_customers(path, chunks):
+    # Stream chunks into one Parquet file without holding them all
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def generate(
+    output_dir,
+    n_products,
+    n_periods=3,
+    n_customers=0,
+    seed=0,
+    current="23Q1",
+    step=4,
+    excel=True,
+):
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+
+    sheets = experience_sheets(n_products, n_periods, seed, current, step)
+    for name, frame in sheets.items():
+        path = os.path.join(output_dir, f"data-{name}.parquet")
+        frame.to_parquet(path)
+        written.append(path)
+
+    if excel:
+        path = os.path.join(output_dir, "data.xlsx")
+        with pd.ExcelWriter(path) as writer:
+            for name, frame in sheets.items():
+                frame.to_excel(writer, sheet_name=name, index=False)
+        written.append(path)
+
+    if n_customers:
+        periods = list(sheets["Sheet1"].columns[1:])
+        study = study_number(current)
+
+        path = os.path.join(output_dir, "customers.parquet")
+        write_customers(path, customer_chunks(n_customers, periods, seed, study=study))
+        written.append(path)
+
+        if excel and n_customers <= EXCEL_MAX_ROWS:
+            path = os.path.join(output_dir, "data_2.xlsx")
+            customers = pd.concat(
+                customer_chunks(n_customers, periods, seed, study=study)
+            )
+            customers.to_excel(path, sheet_name="Sheet1", index=False)
+            written.append(path)
+
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic workbooks")
+    parser.add_argument("--output-dir", default="synthetic")
+    parser.add_argument("--products", type=int, default=1_000)
+    parser.add_argument("--periods", type=int, default=3)
+    parser.add_argument("--customers", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--current", default="23Q1", help="current period, e.g. 23Q1 or 2023Q1"
+    )
+    parser.add_argument("--step", type=int, default=4, help="quarters between periods")
+    parser.add_argument("--no-excel", action="store_true", help="Parquet only")
+    args = parser.parse_args()
+
+    for path in generate(
+        args.output_dir,
+        args.products,
+        args.periods,
+        args.customers,
+        args.seed,
+        args.current,
+        args.step,
+        excel=not args.no_excel,
+    ):
+        print(path)
@@ -0,0 +1,166 @@
+import logging
+import os
+import threading
+
+from flask import g
+
+import config
+import data_store
+import workbook_cache
+
+# --------------------------------------------------
+# Workbook Hot Reload
+# --------------------------------------------------
+# A background thread polls the source workbook. Once a change has settled,
+# it parses the new workbook, builds a fresh data snapshot, lets the
+# registered reload hooks drop caches of the old version and warm them for
+# the new one, then publishes the snapshot. Requests already running keep the
+# snapshot they were pinned to; browsers pick up the new data version through
+# the data-refresh interval (see dashboard.py).
+
+logger = logging.getLogger(__name__)
+
+# Called with the new data version, with the new snapshot pinned, before it
+# is published
+reload_hooks = []
+
+# Called once by each serving process, in a background thread started by its
+# first request
+start_hooks = []
+
+
+def on_reload(hook):
+    reload_hooks.append(hook)
+    return hook
+
+
+def on_start(hook):
+    start_hooks.append(hook)
+    return hook
+
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def reload_data(path=config.DATA_FILE):
+    sheets, version = workbook_cache.read_workbook(path)
+    if version == data_store.current().data_version:
+        return False  # Touched, but the content is unchanged
+
+    _swap(data_store.build_snapshot(sheets, version))
+    logger.info("Loaded %s as data version %s", path, version)
+    return True
+
+
+def append_data(period, data_table):
+    # Add one new study quarter to the served data without re-reading the
+    # workbook or rebuilding the history already loaded; for code running in
+    # the serving process that aggregates extracts itself (see
+    # ingest.period_tables). A later workbook reload replaces the result.
+    snapshot = data_store.append_period(period, data_table)
+    _swap(snapshot)
+    logger.info("Appended %s as data version %s", period, snapshot.data_version)
+
+
+def _swap(snapshot):
+    # Rebuild version-keyed caches before any request can see the new
+    # version, so the first users after the swap do not pay for them
+    data_store.clear_caches()
+    with data_store.pinned(snapshot):
+        for hook in reload_hooks:
+            hook(snapshot.data_version)
+
+    data_store.publish(snapshot)
+
+
+class WorkbookWatcher(threading.Thread):
+    def __init__(self, path=config.DATA_FILE, interval=config.RELOAD_INTERVAL):
+        super().__init__(name="workbook-watcher", daemon=True)
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        loaded = file_signature(self.path)
+        seen = loaded
+
+        while not self.stopped.wait(self.interval):
+            signature = file_signature(self.path)
+
+            # Reload only once the file has stopped changing between two
+            # polls, so a workbook that is still being written is not read
+            if signature is None or signature == loaded or signature != seen:
+                seen = signature
+                continue
+
+            try:
+                reload_data(self.path)
+                loaded = signature
+            except Exception:
+                # Keep serving the current snapshot; retried on the next poll
+                logger.exception("Reloading %s failed", self.path)
+
+    def stop(self):
+        self.stopped.set()
+
+
+# --------------------------------------------------
+# Request Pinning
+# --------------------------------------------------
+
+watcher = None
+started = False
+_start_lock = threading.Lock()
+
+
+def start():
+    # Run by the first request, so only serving processes (under any WSGI
+    # server, but not e.g. the debug reloader's parent process) run the
+    # start hooks and a watcher. Both run in a background thread, so no
+    # request waits for them.
+    global started
+    with _start_lock:
+        if started:
+            return
+        threading.Thread(
+            target=_run_start_hooks, name="dashboard-start", daemon=True
+        ).start()
+        started = True
+
+
+def _run_start_hooks():
+    global watcher
+    for hook in start_hooks:
+        try:
+            hook()
+        except Exception:
+            logger.exception("Start hook %s failed", hook.__name__)
+
+    # Watched only once the start hooks are done, so a reload does not race
+    # them
+    if config.RELOAD_INTERVAL > 0:
+        watcher = WorkbookWatcher()
+        watcher.start()
+
+
+def _pin_snapshot():
+    if not started:
+        start()
+    g.data_snapshot_token = data_store.pin()
+
+
+def _unpin_snapshot(exception=None):
+    token = g.pop("data_snapshot_token", None)
+    if token is not None:
+        data_store.unpin(token)
+
+
+def install(app):
+    server = app.server
+    server.before_request(_pin_snapshot)
+    server.teardown_request(_unpin_snapshot)
@@ -0,0 +1,337 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import config
+
+# --------------------------------------------------
+# Experience Extract Ingestion
+# --------------------------------------------------
+# Aggregates policy- and claim-level extracts (CSV or Parquet, single files
+# or folders of partitions) into the per-product experience sheets of
+# data.xlsx. Extracts are streamed in chunks, and each chunk is reduced to
+# one row per (product, period) straight away, so memory is bounded by the
+# number of products and periods, not the number of rows. Partitions (files,
+# or row group ranges of a Parquet file) are aggregated across a process
+# pool.
+#
+# python ingest.py --policies policies/ --claims claims.parquet --output data.xlsx
+
+KEYS = ["Product", "Period"]
+
+# Extract column -> experience sheet column. A policy extract without a Lives
+# column counts every row as one life.
+POLICY_FIELDS = {"Contribution": "Net Contribution", "Lives": "Number of Lives"}
+CLAIM_FIELDS = {"Claim Amount": "Incurred Claim"}
+
+# Quarters covered by the "3Yr Cum" figures, including the study period
+CUMULATIVE_QUARTERS = 12
+
+# Sheet2 / Sheet3 columns, in workbook order
+CURRENT_COLUMNS = [
+    "Product",
+    "Net Contribution",
+    "Incurred Claim",
+    "Loss Ratio",
+    "3Yr Cum Net Contribution",
+    "3Yr Cum Incurred Claim",
+    "Loss Ratio.1",
+    "Number of Lives",
+    "Average Claim Size",
+    "Last Reprice Date",
+    "Mths Since Reprice",
+]
+PREVIOUS_COLUMNS = [
+    "Product",
+    "Net Contribution",
+    "Incurred Claim",
+    "Loss Ratio",
+    "Number of Lives",
+    "Average Claim Size",
+    "Last Reprice Date",
+    "Mths Since Reprice",
+]
+
+EXTRACT_SUFFIXES = (".csv", ".parquet")
+
+# Study period labels as used in data.xlsx, e.g. "23Q1"
+QUARTER_LABEL = r"\d{2}Q[1-4]"
+
+
+# --------------------------------------------------
+# Partitions and Chunks
+# --------------------------------------------------
+
+
+def extract_files(path):
+    # A folder holds one partition per file
+    if os.path.isdir(path):
+        return [
+            os.path.join(path, name)
+            for name in sorted(os.listdir(path))
+            if name.lower().endswith(EXTRACT_SUFFIXES)
+        ]
+    return [path]
+
+
+def partitions(paths, workers):
+    # (path, row groups) tasks: CSV files are read whole, Parquet files are
+    # split into row group ranges so a single large file still spreads over
+    # the workers
+    import pyarrow.parquet as pq
+
+    tasks = []
+    for path in [file for path in paths for file in extract_files(path)]:
+        if not path.lower().endswith(".parquet"):
+            tasks.append((path, None))
+            continue
+
+        n_groups = pq.ParquetFile(path).num_row_groups
+        for groups in np.array_split(np.arange(n_groups), min(n_groups, workers * 4)):
+            tasks.append((path, groups.tolist()))
+    return tasks
+
+
+def read_chunks(path, row_groups, columns, chunk_size):
+    # Only the needed columns, one chunk of rows at a time
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        file = pq.ParquetFile(path)
+        columns = [column for column in columns if column in file.schema_arrow.names]
+        for batch in file.iter_batches(chunk_size, row_groups, columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(
+            path, usecols=lambda column: column in columns, chunksize=chunk_size
+        )
+
+
+def quarter_periods(period):
+    # Calendar quarter (Period[Q]) of each value: dates (e.g. transaction
+    # dates, which CSV reads as text) and "23Q1" style labels alike, so
+    # chunks and partitions of either kind add up on the same keys
+    if pd.api.types.is_datetime64_any_dtype(period):
+        return period.dt.to_period("Q")
+
+    # Converted once per distinct value
+    codes, uniques = pd.factorize(period)
+    labels = pd.Series(uniques).astype(str)
+    is_label = labels.str.fullmatch(QUARTER_LABEL).to_numpy()
+
+    quarters = pd.Series(pd.NaT, index=labels.index, dtype="period[Q-DEC]")
+    quarters[is_label] = pd.PeriodIndex.from_fields(
+        year=2000 + labels[is_label].str[:2].astype(int),
+        quarter=labels[is_label].str[-1].astype(int),
+        freq="Q",
+    )
+    quarters[~is_label] = pd.to_datetime(uniques[~is_label]).to_period("Q")
+    return pd.Series(quarters.to_numpy()[codes], index=period.index)
+
+
+def summarize_chunk(chunk, fields):
+    chunk = chunk.rename(columns=fields)
+    if "Number of Lives" in fields.values() and "Number of Lives" not in chunk:
+        chunk["Number of Lives"] = 1
+
+    chunk["Period"] = quarter_periods(chunk["Period"])
+    return chunk.groupby(KEYS, sort=False)[list(fields.values())].sum()
+
+
+def aggregate_partition(task):
+    path, row_groups, fields, chunk_size = task
+    columns = KEYS + list(fields)
+
+    totals = None
+    for chunk in read_chunks(path, row_groups, columns, chunk_size):
+        summary = summarize_chunk(chunk, fields)
+        totals = summary if totals is None else totals.add(summary, fill_value=0)
+    return totals
+
+
+def aggregate(
+    paths, fields, workers=config.INGEST_WORKERS, chunk_size=config.INGEST_CHUNK_SIZE
+):
+    # Per (product, period) totals of the extract fields over every partition
+    tasks = [
+        (path, row_groups, fields, chunk_size)
+        for path, row_groups in partitions(paths, workers)
+    ]
+
+    if workers <= 1:
+        results = map(aggregate_partition, tasks)
+        return _combine(results, fields)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return _combine(executor.map(aggregate_partition, tasks), fields)
+
+
+def _combine(results, fields):
+    # Folded in as partitions finish, so only one partial is held at a time
+    totals = None
+    for result in results:
+        if result is None:
+            continue
+        totals = result if totals is None else totals.add(result, fill_value=0)
+
+    if totals is None:
+        return pd.DataFrame(
+            columns=list(fields.values()),
+            index=pd.MultiIndex.from_arrays([[], []], names=KEYS),
+        )
+    return totals
+
+
+# --------------------------------------------------
+# Experience Sheets
+# --------------------------------------------------
+
+
+def quarter_label(period):
+    # Calendar quarters become "23Q1" labels
+    if isinstance(period, pd.Period):
+        return f"{period.year % 100:02d}Q{period.quarter}"
+    return str(period)
+
+
+def quarter_index(label):
+    return int(label[:2]) * 4 + int(label[-1]) - 1
+
+
+def _ratio(numerator, denominator):
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.full_like(numerator, np.nan),
+        where=denominator != 0,
+    )
+
+
+def period_tables(policy_totals, claim_totals):
+    # Sheet2-shaped table per study period, "All" first, then the products
+    totals = [
+        frame.rename(index=quarter_label, level="Period")
+        for frame in (policy_totals, claim_totals)
+    ]
+    totals = totals[0].join(totals[1], how="outer").fillna(0)
+
+    periods = sorted(totals.index.unique("Period"), key=quarter_index)
+    wide = {
+        column: totals[column]
+        .unstack("Period", fill_value=0)
+        .reindex(columns=periods, fill_value=0)
+        .sort_index()
+        for column in ["Net Contribution", "Incurred Claim", "Number of Lives"]
+    }
+    products = ["All"] + list(wide["Net Contribution"].index)
+
+    # Product x period arrays with the portfolio total as the first row
+    values = {}
+    for column, frame in wide.items():
+        array = frame.to_numpy(dtype="float64")
+        values[column] = np.vstack([array.sum(axis=0), array])
+
+    # Trailing 3-year sums: period q counts towards p when it falls within
+    # the CUMULATIVE_QUARTERS quarters ending at p
+    index = np.array([quarter_index(period) for period in periods])
+    window = (index[None, :] <= index[:, None]) & (
+        index[None, :] > index[:, None] - CUMULATIVE_QUARTERS
+    )
+    cumulative = {
+        column: values[column] @ window.T.astype("float64")
+        for column in ["Net Contribution", "Incurred Claim"]
+    }
+
+    tables = {}
+    for i, period in enumerate(periods):
+        contribution = values["Net Contribution"][:, i]
+        claims = values["Incurred Claim"][:, i]
+        lives = values["Number of Lives"][:, i]
+        cum_contribution = cumulative["Net Contribution"][:, i]
+        cum_claims = cumulative["Incurred Claim"][:, i]
+
+        tables[period] = pd.DataFrame(
+            {
+                "Product": products,
+                "Net Contribution": contribution,
+                "Incurred Claim": claims,
+                "Loss Ratio": _ratio(claims, contribution),
+                "3Yr Cum Net Contribution": cum_contribution,
+                "3Yr Cum Incurred Claim": cum_claims,
+                "Loss Ratio.1": _ratio(cum_claims, cum_contribution),
+                "Number of Lives": lives,
+                "Average Claim Size": _ratio(claims, lives),
+                # Repricing is not part of the extracts
+                "Last Reprice Date": pd.NaT,
+                "Mths Since Reprice": np.nan,
+            },
+            columns=CURRENT_COLUMNS,
+        )
+
+    return tables
+
+
+def workbook_sheets(tables, periods=None):
+    # Sheets shaped like data.xlsx: Sheet1 loss ratios over the study periods
+    # (the last one labelled "Current"), Sheet2 the current period and Sheet3
+    # the one before it
+    periods = periods or list(tables)
+    current, previous = tables[periods[-1]], tables[periods[max(len(periods) - 2, 0)]]
+
+    chart = pd.DataFrame({"Product": current["Product"]})
+    for period in periods:
+        label = "Current" if period == periods[-1] else period
+        chart[label] = tables[period]["Loss Ratio"].to_numpy()
+
+    return {
+        "Sheet1": chart,
+        "Sheet2": current,
+        "Sheet3": previous[PREVIOUS_COLUMNS],
+    }
+
+
+def ingest(
+    policy_paths,
+    claim_paths,
+    periods=None,
+    workers=config.INGEST_WORKERS,
+    chunk_size=config.INGEST_CHUNK_SIZE,
+):
+    policy_totals = aggregate(policy_paths, POLICY_FIELDS, workers, chunk_size)
+    claim_totals = aggregate(claim_paths, CLAIM_FIELDS, workers, chunk_size)
+    return workbook_sheets(period_tables(policy_totals, claim_totals), periods)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate experience extracts")
+    parser.add_argument("--policies", nargs="+", required=True)
+    parser.add_argument("--claims", nargs="+", required=True)
+    parser.add_argument("--output", default=config.DATA_FILE)
+    parser.add_argument(
+        "--periods", nargs="+", help="study periods for Sheet1, e.g. 21Q1 22Q1 23Q1"
+    )
+    parser.add_argument("--workers", type=int, default=config.INGEST_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=config.INGEST_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sheets = ingest(
+        args.policies, args.claims, args.periods, args.workers, args.chunk_size
+    )
+
+    # Written next to the target and swapped in, so a running dashboard's
+    # hot reload never reads a half-written workbook
+    tmp_path = f"{args.output}.{os.getpid()}.tmp.xlsx"
+    with pd.ExcelWriter(tmp_path) as writer:
+        for name, frame in sheets.items():
+            frame.to_excel(writer, sheet_name=name, index=False)
+    os.replace(tmp_path, args.output)
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(sheets['Sheet2']) - 1} products written to {args.output} in {elapsed:.2f}s"
+    )
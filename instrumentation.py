@@ -0,0 +1,309 @@
+import ipaddress
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from itertools import accumulate
+
+from flask import Response, abort, g, has_request_context, request
+
+import config
+
+# --------------------------------------------------
+# Callback Instrumentation
+# --------------------------------------------------
+# Records, for every Dash callback request: wall time, time spent in data
+# lookup, figure build and serialization, response payload size and figure
+# cache hits/misses. Observations go into in-process histograms, exposed in
+# Prometheus text format on /metrics: cumulative since start as Prometheus
+# expects, plus quantile gauges over the last METRICS_WINDOW observations
+# for a quick look without a Prometheus server. Hooks are installed on the
+# app with install(app) in dashboard.py.
+
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5]
+PAYLOAD_BUCKETS = [1e3, 5e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6]
+
+# Quantiles of the recent observations, exposed as <metric>_recent gauges
+RECENT_QUANTILES = [0.5, 0.95, 0.99]
+
+
+class Histogram:
+    def __init__(self, buckets, window):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)  # Observations per bucket
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        # Counted in the first bucket whose upper bound is >= value; values
+        # above every bound only count towards +Inf
+        bucket = bisect_left(self.buckets, value)
+        if bucket < len(self.buckets):
+            self.bucket_counts[bucket] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def snapshot(self):
+        # Cumulative bucket counts, sum and count since start, and the
+        # nearest-rank quantiles of the recent window
+        values = sorted(self.recent)
+        quantiles = [
+            values[max(math.ceil(q * len(values)) - 1, 0)]
+            for q in RECENT_QUANTILES
+            if values
+        ]
+        return list(accumulate(self.bucket_counts)), self.sum, self.count, quantiles
+
+
+_lock = threading.Lock()
+_histograms = {}  # (metric, labels) -> Histogram
+_counters = defaultdict(int)  # (metric, labels) -> count
+
+
+def observe(metric, labels, value, buckets=LATENCY_BUCKETS):
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram(buckets, config.METRICS_WINDOW)
+        histogram.observe(value)
+
+
+def increment(metric, labels, amount=1):
+    with _lock:
+        _counters[(metric, tuple(sorted(labels.items())))] += amount
+
+
+# --------------------------------------------------
+# Per-request Recording
+# --------------------------------------------------
+
+
+def _recording():
+    return has_request_context() and "callback_metrics" in g
+
+
+@contextmanager
+def stage(name):
+    # Time a block of a callback, e.g. stage("lookup") or stage("build")
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _recording():
+            g.callback_metrics["stages"][name] += time.perf_counter() - start
+
+
+def instrumented(callback):
+    # Marks when the callback body returns; the rest of the request is Dash
+    # serializing the outputs
+    @wraps(callback)
+    def wrapper(*args, **kwargs):
+        try:
+            return callback(*args, **kwargs)
+        finally:
+            if _recording():
+                g.callback_metrics["returned"] = time.perf_counter()
+
+    return wrapper
+
+
+def count_cache(hit, cache="figure"):
+    if _recording():
+        g.callback_metrics["cache"][(cache, "hit" if hit else "miss")] += 1
+
+
+def counted_cache(name, maxsize=128):
+    # functools.lru_cache whose hits and misses are counted like the figure
+    # cache's; a miss is detected by the wrapped function running in this
+    # thread, so concurrent requests do not blur the counts
+    def decorate(function):
+        local = threading.local()
+
+        @lru_cache(maxsize=maxsize)
+        def cached(*args):
+            local.missed = True
+            return function(*args)
+
+        @wraps(function)
+        def wrapper(*args):
+            local.missed = False
+            result = cached(*args)
+            count_cache(not local.missed, name)
+            return result
+
+        wrapper.cache_clear = cached.cache_clear
+        wrapper.cache_info = cached.cache_info
+        return wrapper
+
+    return decorate
+
+
+def callback_label(body):
+    # First output of the callback, e.g. "selected-curr-claim.figure"
+    output = (body or {}).get("output", "unknown")
+    return output.strip(".").split("...")[0]
+
+
+def _before_request():
+    if request.path.endswith("/_dash-update-component"):
+        g.callback_metrics = {
+            "start": time.perf_counter(),
+            "stages": defaultdict(float),
+            "returned": None,
+            "cache": defaultdict(int),  # (cache, result) -> lookups
+        }
+
+
+def _after_request(response):
+    recorded = g.pop("callback_metrics", None)
+    if recorded is None:
+        return response
+
+    end = time.perf_counter()
+    labels = {"callback": callback_label(request.get_json(silent=True))}
+
+    observe("dashboard_callback_seconds", labels, end - recorded["start"])
+    for name, seconds in recorded["stages"].items():
+        observe("dashboard_callback_stage_seconds", {**labels, "stage": name}, seconds)
+    if recorded["returned"] is not None:
+        observe(
+            "dashboard_callback_stage_seconds",
+            {**labels, "stage": "serialize"},
+            end - recorded["returned"],
+        )
+
+    observe(
+        "dashboard_callback_response_bytes",
+        labels,
+        len(response.get_data()),
+        PAYLOAD_BUCKETS,
+    )
+    for (cache, result), count in recorded["cache"].items():
+        increment(
+            "dashboard_cache_total",
+            {**labels, "cache": cache, "result": result},
+            count,
+        )
+
+    return response
+
+
+# --------------------------------------------------
+# Prometheus Exposition
+# --------------------------------------------------
+
+METRIC_HELP = {
+    "dashboard_callback_seconds": ("histogram", "Dash callback wall time"),
+    "dashboard_callback_stage_seconds": (
+        "histogram",
+        "Callback time by stage (lookup, build, serialize)",
+    ),
+    "dashboard_callback_response_bytes": ("histogram", "Callback response size"),
+    "dashboard_cache_total": (
+        "counter",
+        "Cache lookups by cache (figure, all_panel, product_metrics) and result",
+    ),
+}
+
+
+def _escape(value):
+    # Label values escape backslash, double quote and line feed
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return "{" + pairs + "}" if pairs else ""
+
+
+def render_metrics():
+    from figure_cache import figure_cache
+
+    with _lock:
+        histograms = {
+            key: h.snapshot() + (h.buckets,) for key, h in _histograms.items()
+        }
+        counters = dict(_counters)
+
+    lines = []
+    for metric, (kind, text) in METRIC_HELP.items():
+        lines += [f"# HELP {metric} {text}", f"# TYPE {metric} {kind}"]
+
+        series = sorted(
+            (labels, snapshot)
+            for (name, labels), snapshot in histograms.items()
+            if name == metric
+        )
+        for labels, (counts, total, count, _, buckets) in series:
+            for bound, bucket_count in zip(buckets, counts):
+                bucket_labels = _format_labels(labels + (("le", f"{bound:g}"),))
+                lines.append(f"{metric}_bucket{bucket_labels} {bucket_count}")
+            inf_labels = _format_labels(labels + (("le", "+Inf"),))
+            lines.append(f"{metric}_bucket{inf_labels} {count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+
+        for (name, labels), value in sorted(counters.items()):
+            if name == metric:
+                lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+        # Rolling view of the same series, which may go down between scrapes
+        if kind == "histogram":
+            lines += [
+                f"# HELP {metric}_recent {text}, quantiles of the last "
+                f"{config.METRICS_WINDOW} observations",
+                f"# TYPE {metric}_recent gauge",
+            ]
+            for labels, (_, _, _, quantiles, _) in series:
+                for q, value in zip(RECENT_QUANTILES, quantiles):
+                    quantile_labels = _format_labels(labels + (("quantile", f"{q:g}"),))
+                    lines.append(f"{metric}_recent{quantile_labels} {value}")
+
+    stats = figure_cache.stats()
+    lines += [
+        "# HELP dashboard_figure_cache_entries Figures held by the LRU cache",
+        "# TYPE dashboard_figure_cache_entries gauge",
+        f"dashboard_figure_cache_entries {stats['size']}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+# Headers a reverse proxy adds for the client it forwards
+FORWARDED_HEADERS = ["Forwarded", "X-Forwarded-For", "X-Real-IP"]
+
+
+def _metrics_allowed():
+    if not config.METRICS_ALLOW:
+        return True
+
+    # A proxy on this machine makes every client look local: only requests
+    # reaching the app directly are checked against the allow-list
+    if any(header in request.headers for header in FORWARDED_HEADERS):
+        return False
+    try:
+        address = ipaddress.ip_address(request.remote_addr)
+    except (TypeError, ValueError):
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in config.METRICS_ALLOW
+    )
+
+
+def _metrics_view():
+    if not _metrics_allowed():
+        abort(403)
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+def install(app):
+    server = app.server
+    server.before_request(_before_request)
+    server.after_request(_after_request)
+    server.add_url_rule("/metrics", "metrics", _metrics_view)
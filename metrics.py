@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# Experience Metrics Engine
+# --------------------------------------------------
+# Every derived figure for every product is computed in one vectorized pass
+# at load time, so callbacks only need to read a row.
+
+# Metric name -> source column in the current/previous sheets
+SOURCE_COLUMNS = {
+    "claim": "Incurred Claim",
+    "cont": "Net Contribution",
+    "num_lives": "Number of Lives",
+    "avg_claim": "Average Claim Size",
+}
+
+# Metric name -> factor used to show the metric on the dashboard
+# (loss ratio in %, claims and contribution in millions)
+DISPLAY_SCALE = {
+    "lossRatio": 100,
+    "claim": 1 / 1_000_000,
+    "cont": 1 / 1_000_000,
+    "num_lives": 1,
+    "avg_claim": 1,
+}
+
+
+def loss_ratio(frame, claim, cont):
+    # Claims over contribution; periods that only report a loss ratio (the
+    # earlier study periods) fall back to the reported figure
+    ratio = claim / cont
+    if "Loss Ratio" in frame:
+        reported = frame["Loss Ratio"].to_numpy(dtype="float64")
+        ratio = np.where(np.isnan(ratio), reported, ratio)
+    return ratio
+
+
+def compute_metrics(data_curr, data_prev):
+    # Align the previous period to the current product order
+    curr = data_curr.set_index("Product")
+    prev = data_prev.set_index("Product").reindex(curr.index)
+
+    # Raw current / previous values as float arrays
+    values = {
+        name: (
+            curr[column].to_numpy(dtype="float64"),
+            prev[column].to_numpy(dtype="float64"),
+        )
+        for name, column in SOURCE_COLUMNS.items()
+    }
+    (claim_curr, claim_prev), (cont_curr, cont_prev) = values["claim"], values["cont"]
+    values["lossRatio"] = (
+        loss_ratio(curr, claim_curr, cont_curr),
+        loss_ratio(prev, claim_prev, cont_prev),
+    )
+
+    columns = {}
+    for name, (current, previous) in values.items():
+        delta = current - previous
+        scale = DISPLAY_SCALE[name]
+
+        columns[f"current_{name}"] = current
+        columns[f"prev_{name}"] = previous
+        columns[f"delta_{name}"] = delta
+        columns[f"pct_delta_{name}"] = np.divide(
+            delta,
+            previous,
+            out=np.full_like(delta, np.nan),
+            where=previous != 0,
+        )
+        columns[f"pct_delta_{name}_scaled"] = columns[f"pct_delta_{name}"] * 100
+        columns[f"current_{name}_scaled"] = current * scale
+        columns[f"prev_{name}_scaled"] = previous * scale
+        columns[f"delta_{name}_scaled"] = delta * scale
+
+    metrics = pd.DataFrame(columns, index=curr.index)
+
+    # Repricing details only exist for the current period (earlier study
+    # periods have none)
+    metrics["reprice_date"] = curr.get("Last Reprice Date", np.nan)
+    metrics["reprice_mnths"] = curr.get("Mths Since Reprice", np.nan)
+
+    return metrics
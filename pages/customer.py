@@ -0,0 +1,287 @@
+from dash import html, dcc, Input, Output, ctx, dash_table
+from functools import lru_cache
+import dash
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+import config
+import customer_store
+import data_store
+import spyder_chart
+from instrumentation import instrumented, stage
+from timeseries import quarter_number
+
+# register page in directory
+dash.register_page(__name__, path="/customer")
+
+
+def empty_chart():
+    figure = go.Figure()
+    figure.update_layout(
+        annotations=[
+            dict(text="No customers match the filters", showarrow=False, x=0.5, y=0.5)
+        ],
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False),
+    )
+    return figure
+
+
+@lru_cache(maxsize=32)
+def build_summary_chart(version, filters, mode):
+
+    # Clusters or percentile bands of a whole selection, whatever its size
+    # (the version key only separates customer workbook versions). Clusters
+    # are fitted once per table, not per selection.
+    table = customer_store.customer_table()
+    positions = table.filter(*filters)
+    if len(positions) == 0:
+        return empty_chart()
+    if mode == "clusters":
+        return spyder_chart.create_cluster_chart(table.clusters(positions))
+    return spyder_chart.create_spider_chart(table.rows(positions), mode=mode)
+
+
+# --------------------------------------------------
+# Dashboard Content Layout
+# --------------------------------------------------
+
+# Filter options are taken from the customer table loaded at start
+TABLE = customer_store.customer_table()
+AGE_MIN, AGE_MAX = TABLE.age_range
+
+
+def study_quarter():
+    # "Q1 2024": quarter of the latest customer date, or without dates the
+    # experience data's current study period
+    if TABLE.has_dates:
+        latest = pd.Timestamp(np.nanmax(TABLE.dates))
+        return f"Q{latest.quarter} {latest.year}"
+
+    label = data_store.period_labels[data_store.period_columns[-1]]
+    number = quarter_number(label)
+    return label if number is None else f"Q{number % 4 + 1} {number // 4}"
+
+
+layout = html.Div(
+    [
+        # Header section
+        html.Div(
+            [
+                html.Div("Co.", className="logo"),
+                html.Div(
+                    [
+                        html.Div(
+                            "Claim Experience Study - Customer Profiles",
+                            className="title-text",
+                        ),
+                        html.Div(study_quarter(), className="title-date"),
+                    ],
+                    className="title",
+                ),
+            ],
+            className="header",
+        ),
+        # Menu section
+        html.Div(
+            html.Ul(
+                [
+                    html.Li(dcc.Link("Overview", href="/")),
+                    html.Li(dcc.Link("Product", href="/product")),
+                    html.Li(
+                        dcc.Link("Customer", href="/customer"),
+                        className="selected-menu-item",
+                    ),
+                ]
+            ),
+            className="menu",
+        ),
+        # Filter section
+        html.Div(
+            [
+                # Dates where the table has them, its study period labels
+                # otherwise
+                dcc.DatePickerRange(
+                    id="customer-dates",
+                    clearable=True,
+                    min_date_allowed=(
+                        pd.Timestamp(np.nanmin(TABLE.dates)).date()
+                        if TABLE.has_dates
+                        else None
+                    ),
+                    max_date_allowed=(
+                        pd.Timestamp(np.nanmax(TABLE.dates)).date()
+                        if TABLE.has_dates
+                        else None
+                    ),
+                    style={} if TABLE.has_dates else {"display": "none"},
+                ),
+                dcc.Dropdown(
+                    id="customer-periods",
+                    options=TABLE.period_labels,
+                    multi=True,
+                    placeholder="All study periods",
+                    style=(
+                        {"display": "none"} if TABLE.has_dates else {"width": "250px"}
+                    ),
+                ),
+                dcc.Dropdown(
+                    id="customer-riders",
+                    options=[
+                        {"label": label, "value": code}
+                        for label, code in spyder_chart.RIDER_CODES.items()
+                    ],
+                    multi=True,
+                    placeholder="All riders",
+                    style={"width": "300px"},
+                ),
+                html.Div(
+                    [
+                        html.Div("Age"),
+                        dcc.RangeSlider(
+                            id="customer-ages",
+                            min=AGE_MIN,
+                            max=AGE_MAX,
+                            step=1,
+                            value=[AGE_MIN, AGE_MAX],
+                            marks={
+                                int(age): str(int(age))
+                                for age in np.linspace(AGE_MIN, AGE_MAX, 5).round()
+                            },
+                        ),
+                    ],
+                    style={"width": "300px"},
+                ),
+                html.Div(
+                    [
+                        html.Div("Gender"),
+                        dcc.RangeSlider(
+                            id="customer-gender",
+                            min=0,
+                            max=1,
+                            step=0.1,
+                            value=[0, 1],
+                            marks={0: "0", 1: "1"},
+                        ),
+                    ],
+                    style={"width": "200px"},
+                ),
+                dcc.RadioItems(
+                    id="customer-chart-mode",
+                    options=[
+                        {"label": "Page profiles", "value": "profiles"},
+                        {"label": "Clusters", "value": "clusters"},
+                        {"label": "Percentile bands", "value": "bands"},
+                    ],
+                    value="profiles",
+                ),
+            ],
+            className="container-flex-row",
+            style={"gap": "15px", "alignItems": "center", "padding": "15px"},
+        ),
+        # Content section
+        html.Div(
+            [
+                html.Div(
+                    [dcc.Graph(id="customer-chart")],
+                    className="content-left",
+                ),
+                html.Div(
+                    [
+                        html.Div(
+                            id="customer-count",
+                            className="selected-product-title",
+                        ),
+                        html.Br(),
+                        dash_table.DataTable(
+                            id="customer-table",
+                            columns=[
+                                {"name": column, "id": column}
+                                for column in TABLE.customers.columns
+                            ],
+                            data=[],  # Will be filled by callback
+                            # Pages are cut on the server; only the one shown
+                            # is sent to the browser
+                            page_action="custom",
+                            page_current=0,
+                            page_size=config.CUSTOMER_PAGE_SIZE,
+                            style_cell={
+                                "font-family": "var(--font-family)",
+                                "textAlign": "right",
+                            },
+                            style_header={
+                                "background-color": "var(--theme-color)",
+                                "font-weight": "bold",
+                                "color": "white",
+                            },
+                        ),
+                    ],
+                    className="content-right",
+                ),
+            ],
+            className="content",
+        ),
+    ]
+)
+
+# --------------------------------------------------
+# Callbacks
+# --------------------------------------------------
+
+
+@dash.callback(
+    [
+        Output("customer-chart", "figure"),
+        Output("customer-table", "data"),
+        Output("customer-table", "page_count"),
+        Output("customer-table", "page_current"),
+        Output("customer-count", "children"),
+    ],
+    [
+        Input("customer-dates", "start_date"),
+        Input("customer-dates", "end_date"),
+        Input("customer-periods", "value"),
+        Input("customer-riders", "value"),
+        Input("customer-gender", "value"),
+        Input("customer-ages", "value"),
+        Input("customer-chart-mode", "value"),
+        Input("customer-table", "page_current"),
+    ],
+)
+@instrumented
+def update_customers(start_date, end_date, periods, riders, gender, ages, mode, page):
+    table = customer_store.customer_table()
+
+    # A new filter starts again from the first page
+    if ctx.triggered_id != "customer-table":
+        page = 0
+
+    filters = (
+        (start_date, end_date),
+        tuple(riders or ()),
+        tuple(gender),
+        tuple(ages),
+        tuple(periods or ()),
+    )
+    with stage("lookup"):
+        positions = table.filter(*filters)
+        page_size = config.CUSTOMER_PAGE_SIZE
+        page_count = max(-(-len(positions) // page_size), 1)
+        page = min(page or 0, page_count - 1)
+        records = table.page(positions, page, page_size)
+
+    with stage("build"):
+        if len(positions) == 0:
+            figure = empty_chart()
+        elif mode == "profiles":
+            # Only the profiles on the current page are drawn
+            page_positions = positions[page * page_size : (page + 1) * page_size]
+            figure = spyder_chart.create_spider_chart(
+                table.rows(page_positions), mode="profiles"
+            )
+        else:
+            figure = build_summary_chart(table.version, filters, mode)
+
+    count = f"Customers: {len(positions):,} of {len(table):,}"
+    return figure, records, page_count, page, count
@@ -1,9 +1,20 @@
-from dash import Dash, html, dcc, Input, Output, dash_table
+from dash import Dash, html, dcc, Input, Output, State, dash_table
+from dash import ClientsideFunction
+from dash.exceptions import PreventUpdate
 import dash
 import plotly.graph_objs as go
 import pandas as pd
 import plotly.express as px
-import numpy as np
+
+import config
+import fast_figures
+import data_store
+import sql_store
+from distributions import rank_percentile as distribution_rank, rank_text
+from figure_cache import cached_figure
+from hot_reload import on_reload
+from instrumentation import counted_cache, instrumented, stage
+from projection import projections_ready, published_projection
 
 # register page in directory
 dash.register_page(__name__, path="/")
@@ -11,54 +22,20 @@ dash.register_page(__name__, path="/")
 # --------------------------------------------------
 # Data Processing
 # --------------------------------------------------
-# Data read
-data_chart = pd.read_excel("data.xlsx", sheet_name="Sheet1")
-data_table_curr = pd.read_excel("data.xlsx", sheet_name="Sheet2")
-data_table_prev = pd.read_excel("data.xlsx", sheet_name="Sheet3")
-
-# Convert to percentage
-data_chart[["21Q1", "22Q1", "Current"]] = data_chart[["21Q1", "22Q1", "Current"]] * 100
-
 
-def get_data(products="All"):
 
-    product_name = products
+def get_data(products="All", period=None):
 
-    # Filter the data for all medical product
-    data_curr = data_table_curr[data_table_curr["Product"] == product_name]
-    data_prev = data_table_prev[data_table_curr["Product"] == product_name]
+    # Every derived metric is precomputed for all products by the metrics
+    # engine, so this is a single row read (of the selected study period)
+    if sql_store.ENABLED:
+        return sql_store.metric_record(products, period)
+    return data_store.period_metrics(period)[products]
 
-    # Loss ratio data
-    current_cont = data_curr.iloc[0]["Net Contribution"]
-    prev_cont = data_prev.iloc[0]["Net Contribution"]
-    current_claim = data_curr.iloc[0]["Incurred Claim"]
-    prev_claim = data_prev.iloc[0]["Incurred Claim"]
 
-    current_lossRatio = current_claim / current_cont
-    prev_lossRatio = prev_claim / prev_cont
-
-    # Other data
-    current_num_lives = data_curr.iloc[0]["Number of Lives"]
-    current_avg_claim = data_curr.iloc[0]["Average Claim Size"]
-    prev_num_lives = data_prev.iloc[0]["Number of Lives"]
-    prev_avg_claim = data_prev.iloc[0]["Average Claim Size"]
-    reprice_date = data_curr.iloc[0]["Last Reprice Date"]
-    reprice_mnths = data_curr.iloc[0]["Mths Since Reprice"]
-
-    return (
-        current_lossRatio,
-        current_claim,
-        current_cont,
-        prev_lossRatio,
-        prev_cont,
-        prev_claim,
-        current_num_lives,
-        current_avg_claim,
-        prev_num_lives,
-        prev_avg_claim,
-        reprice_mnths,
-        reprice_date,
-    )
+def period_option(period):
+    # "21Q1" -> "2021 Q1", labels derived at load (see timeseries.py)
+    return {"label": data_store.period_labels.get(period, period), "value": period}
 
 
 def create_dropdown(drop_for):
@@ -82,12 +59,9 @@ def create_dropdown(drop_for):
 
     dropdown_period = dcc.Dropdown(
         id="selected-period",
-        options=[
-            {"label": "2023 Q1", "value": "23Q1"},
-            {"label": "2022 Q1", "value": "22Q1"},
-            {"label": "2021 Q1", "value": "21Q1"},
-        ],
-        value="23Q1",
+        # Study periods in the data, latest first
+        options=[period_option(period) for period in data_store.period_columns[::-1]],
+        value=data_store.period_columns[-1],
         placeholder="Select study period...",
         className="selected-period-dropdown",
         style={
@@ -104,22 +78,17 @@ def create_dropdown(drop_for):
     return dropdown
 
 
-def create_fan():
-    # Step 1: Define existing data points for the line chart
-    x_values = ["21Q1", "22Q1", "Current"]  # Time points for the actual values
-    y_values = [60, 85, 98]  # Loss ratio values for actual time points
+def create_fan(projection):
+    # Step 1: Actual loss ratio history for the line chart
+    x_values = projection["periods"]  # Time points for the actual values
+    y_values = projection["history"]  # Loss ratio values for actual time points
+    last_period, last_value = x_values[-1], y_values[-1]
 
-    # Step 2: Simulate the projected loss ratio for "Projected 24Q1"
-    np.random.seed(42)  # Set a seed for reproducibility
-    k_values = np.random.normal(
-        loc=10, scale=5, size=1000
-    )  # Normally distributed k values
-    projected_value = 98 + k_values  # Add k to the current value of 98%
-
-    # Step 3: Create the fan chart by simulating confidence intervals from the projections
-    x_projected = ["Projected"] * len(
-        k_values
-    )  # All projections for the next time point
+    # Step 2-3: Projected percentiles come from the Monte Carlo engine; until
+    # its batch is published only the history is drawn
+    pending = projection["bands"] is None
+    bands = [] if pending else projection["bands"]
+    projected = [] if pending else ["Projected"]
 
     # Create traces for the fan chart (shaded areas)
     fig = go.Figure()
@@ -127,13 +96,9 @@ def create_fan():
     # Step 4: Add actual line chart
     fig.add_trace(
         go.Scatter(
-            x=x_values + ["Projected"],
-            y=[
-                60,
-                85,
-                98,
-                np.mean(projected_value),
-            ],  # Include the mean of the projected values
+            x=x_values + projected,
+            # Include the mean of the projected values
+            y=y_values + [projection["mean"]] * len(projected),
             mode="lines+markers",
             name="Mean Loss Ratio",
             line=dict(color="rgb(0, 127, 61)", width=2.5),
@@ -143,7 +108,6 @@ def create_fan():
     )
 
     # Step 5: Add confidence intervals for the fan chart
-    percentiles = [0, 25, 50, 75, 100]  # Percentiles to create fan chart intervals
     colors = [
         "rgb(255, 83, 83)",
         "rgba(255, 230, 83,0.6)",
@@ -151,17 +115,12 @@ def create_fan():
         "rgb(255, 83, 83)",
     ]
 
-    # Sort projected values to calculate percentiles
-    sorted_proj = np.sort(projected_value)
-
     # Add percentiles as shaded areas
-    for i in range(len(percentiles) - 1):
-        lower = np.percentile(sorted_proj, percentiles[i])
-        upper = np.percentile(sorted_proj, percentiles[i + 1])
+    for i in range(len(bands) - 1):
         fig.add_trace(
             go.Scatter(
-                x=["Current", "Projected", "Projected", "Current"],
-                y=[98, lower, upper, 98],
+                x=[last_period, "Projected", "Projected", last_period],
+                y=[last_value, bands[i], bands[i + 1], last_value],
                 fill="toself",
                 fillcolor=colors[i],
                 line=dict(color="rgba(255,255,255,0)"),
@@ -169,12 +128,23 @@ def create_fan():
             )
         )
 
+    if pending:
+        fig.add_annotation(
+            text="Projection pending",
+            xref="paper",
+            yref="paper",
+            x=0.5,
+            y=0.5,
+            showarrow=False,
+        )
+
     # Step 6: Update layout for better display
     fig.update_layout(
         paper_bgcolor="rgb(35, 36, 72)",
         plot_bgcolor="rgb(35, 36, 72)",
         yaxis=dict(
-            range=[50, 130],
+            # Widen the default range if the history or projection falls outside
+            range=[min(50, *y_values, *bands[:1]), max(130, *y_values, *bands[-1:])],
             showgrid=False,
         ),
         xaxis=dict(
@@ -198,10 +168,6 @@ def create_fan():
         # width=900,
     )
 
-    # Step 7: Calculate min and max projected values
-    min_proj_value = np.min(projected_value)
-    max_proj_value = np.max(projected_value)
-
     return fig
 
 
@@ -282,22 +248,19 @@ def create_bullet(value):
     return fig
 
 
-def create_box(val):
-    # Generate random data with exponential distribution
-    # np.random.seed(42)
-    # data = np.random.exponential(scale=val, size=30)
-    data = np.random.normal(loc=val, scale=abs(val * 0.2), size=30)
+def create_box(val, metric):
+    # Historical changes of this metric across all products and periods
+    distribution = data_store.distributions[metric]
+    data = distribution["points"]
 
-    # Add jitter to y-axis for better visibility
-    jitter = np.random.normal(0, 0.1, len(data))
+    # Fixed jitter on the y-axis for better visibility
+    jitter = distribution["jitter"]
 
-    # Rank the input value within the generated data
-    rank_percentile = (np.sum(data < val) / len(data)) * 100
+    # Rank the input value within the historical data
+    rank_percentile = distribution_rank(distribution, val)
 
-    # Calculate quartiles
-    q1 = np.percentile(data, 25)
-    median = np.median(data)
-    q3 = np.percentile(data, 75)
+    # Quartiles are precomputed with the distribution
+    q1, median, q3 = distribution["quartiles"]
 
     # Create the figure
     fig = go.Figure()
@@ -351,7 +314,7 @@ def create_box(val):
     )  # 3rd Quartile
 
     # Add annotation for the value point, showing the percentile
-    percentile_text = f"{rank_percentile:.0f}th%"
+    percentile_text = rank_text(rank_percentile, "th%")
     fig.add_annotation(
         x=val * 1.2,
         y=0.5,  # Place the annotation slightly above the point
@@ -366,6 +329,17 @@ def create_box(val):
         ),
     )
 
+    # What the historical values are changes of, left of the plot
+    fig.add_annotation(
+        x=0,
+        y=0,
+        xref="paper",
+        xanchor="right",
+        text=distribution["label"],
+        showarrow=False,
+        font=dict(color="rgb(174, 177, 210)", size=10),
+    )
+
     # Update layout to remove axis titles and values, and adjust appearance
     fig.update_layout(
         xaxis=dict(visible=False),
@@ -378,7 +352,7 @@ def create_box(val):
     )
 
     # Return the chart and the rank percentile as a message
-    percentile_text = f"{rank_percentile:.0f}th percentile"
+    percentile_text = rank_text(rank_percentile, "th percentile")
 
     return fig, percentile_text
 
@@ -438,6 +412,24 @@ def create_delta_card(val, ref, format, suffix, direction="income", height="Medi
     return delta_card
 
 
+# --------------------------------------------------
+# Figure Builders
+# --------------------------------------------------
+# Callbacks render through these cached builders. With FAST_FIGURES on they
+# emit plain-dict specs and skip graph_objects validation; the go.Figure
+# factories above remain the reference implementation.
+if config.FAST_FIGURES:
+    delta_card = cached_figure(fast_figures.create_delta_card)
+    bullet = cached_figure(fast_figures.create_bullet)
+    box = cached_figure(fast_figures.create_box)
+    fan = fast_figures.create_fan
+else:
+    delta_card = cached_figure(create_delta_card)
+    bullet = cached_figure(create_bullet)
+    box = cached_figure(create_box)
+    fan = create_fan
+
+
 # --------------------------------------------------
 # Dashboard Content Layout
 # --------------------------------------------------
@@ -489,6 +481,10 @@ layout = html.Div(
                                 dcc.Link("Lapse", href="/product"),
                                 className="menu-item",
                             ),
+                            html.Li(
+                                dcc.Link("Customer", href="/customer"),
+                                className="menu-item",
+                            ),
                         ]
                     ),
                     className="menu",
@@ -497,6 +493,16 @@ layout = html.Div(
             className="header",
         ),
         html.Div("Medical Loss Ratio", className="title page"),
+        # Card and box plot inputs for every product (held in memory for the
+        # page's lifetime; it outgrows localStorage with many products), the
+        # selected product's inputs and the figure template, used when the
+        # selected product's figures are rendered clientside
+        dcc.Store(id="product-metrics"),
+        dcc.Store(id="selected-metrics"),
+        dcc.Store(
+            id="figure-template",
+            data=fast_figures.DEFAULT_TEMPLATE if config.CLIENTSIDE_CARDS else None,
+        ),
         html.Div(
             [
                 create_dropdown("period"),
@@ -591,6 +597,14 @@ layout = html.Div(
                                         dcc.Graph(
                                             id="fan-chart",
                                         ),
+                                        # Checks for the projection batch
+                                        # while the fan chart is pending
+                                        dcc.Interval(
+                                            id="projection-poll",
+                                            interval=config.VERSION_POLL_INTERVAL
+                                            * 1000,
+                                            disabled=True,
+                                        ),
                                     ],
                                     className="data-card-primary",
                                 ),
@@ -815,135 +829,68 @@ layout = html.Div(
 # --------------------------------------------------
 
 
+# Data version the layout (e.g. the study period options) was built from
+LAYOUT_VERSION = data_store.data_version
+
+
 @dash.callback(
-    [
-        # all loss ratios
-        Output("curr-lossRatio", "figure"),
-        Output("bullet-curr-lossRatio", "figure"),
-        Output("box-curr-lossRatio", "figure"),
-        # all contribution
-        Output("curr-cont", "figure"),
-        Output("box-curr-cont", "figure"),
-        # all claims
-        Output("curr-claim", "figure"),
-        Output("box-curr-claim", "figure"),
-        # all number of claims
-        Output("num-claim", "figure"),
-        Output("box-curr-num-claim", "figure"),
-        # all average claims
-        Output("avg-curr-claim", "figure"),
-        Output("box-curr-avg-claim", "figure"),
-        # all others
-        Output("overview-reprice-date", "children"),
-        Output("overview-reprice-mnths", "children"),
-        Output("fan-chart", "figure"),
-        # selected product display
-        Output("selected-product-display", "children"),
-        # selected loss ratios
-        Output("selected-curr-lossRatio", "figure"),
-        Output("selected-bullet-curr-lossRatio", "figure"),
-        Output("selected-box-curr-lossRatio", "figure"),
-        # selected contribution
-        Output("selected-curr-cont", "figure"),
-        Output("selected-box-curr-cont", "figure"),
-        # selected claims
-        Output("selected-curr-claim", "figure"),
-        Output("selected-box-curr-claim", "figure"),
-        # selected number of claims
-        Output("selected-num-claim", "figure"),
-        Output("selected-box-curr-num-claim", "figure"),
-        # selected average claims
-        Output("selected-avg-curr-claim", "figure"),
-        Output("selected-box-curr-avg-claim", "figure"),
-    ],
-    [Input("selected-product", "value")],
+    [Output("selected-period", "options"), Output("selected-period", "value")],
+    [Input("data-version", "data")],
+    [State("selected-period", "value")],
 )
-def update_data(selected_product):
-
-    # get all medical product data
-    (
-        current_lossRatio,
-        current_claim,
-        current_cont,
-        prev_lossRatio,
-        prev_cont,
-        prev_claim,
-        current_num_claim,
-        current_avg_claim,
-        prev_num_claim,
-        prev_avg_claim,
-        reprice_mnths,
-        reprice_date,
-    ) = get_data("All")
-
-    # get all medical product data
-    (
-        selected_current_lossRatio,
-        selected_current_claim,
-        selected_current_cont,
-        selected_prev_lossRatio,
-        selected_prev_cont,
-        selected_prev_claim,
-        selected_current_num_claim,
-        selected_current_avg_claim,
-        selected_prev_num_claim,
-        selected_prev_avg_claim,
-        selected_reprice_mnths,
-        selected_reprice_date,
-    ) = get_data(selected_product)
+@instrumented
+def update_periods(version, period):
+
+    # Offer the study periods of reloaded data; keep the selected period if
+    # it is still there, otherwise move to the latest one
+    if version == LAYOUT_VERSION:
+        raise PreventUpdate
+    periods = data_store.period_columns
+    options = [period_option(period) for period in periods[::-1]]
+    return options, period if period in periods else periods[-1]
+
+
+@counted_cache("all_panel", maxsize=32)
+def build_all_panel(version, period=None, projected=True):
+
+    # The "All" panel does not depend on the product dropdown, so it is built
+    # once per data version and study period and served from this cache
+    # (separately while the projection batch is pending)
+    data_all = get_data("All", period)
 
     # Delta cards - all
-    ind_current_lossRatio = create_delta_card(
-        current_lossRatio * 100,
-        prev_lossRatio * 100,
+    ind_current_lossRatio = delta_card(
+        data_all["current_lossRatio_scaled"],
+        data_all["prev_lossRatio_scaled"],
         ".1f",
         "%",
         "outgo",
         "big",
     )
-    ind_curr_claim = create_delta_card(
-        current_claim / 1_000_000, prev_claim / 1_000_000, ".1f", "m", "outgo"
-    )
-    ind_curr_cont = create_delta_card(
-        current_cont / 1_000_000, prev_cont / 1_000_000, ".1f", "m", "income"
-    )
-    ind_curr_avg_claim = create_delta_card(
-        current_avg_claim, prev_avg_claim, ".1f", "", "outgo"
-    )
-    ind_curr_num_claim = create_delta_card(
-        current_num_claim, prev_num_claim, ",.0f", "", "outgo"
-    )
-
-    # Delta cards - selected
-    ind_selected_current_lossRatio = create_delta_card(
-        selected_current_lossRatio * 100,
-        selected_prev_lossRatio * 100,
-        ".1f",
-        "%",
-        "outgo",
-        "medium",
-    )
-    ind_selected_curr_claim = create_delta_card(
-        selected_current_claim / 1_000_000,
-        selected_prev_claim / 1_000_000,
+    ind_curr_claim = delta_card(
+        data_all["current_claim_scaled"],
+        data_all["prev_claim_scaled"],
         ".1f",
         "m",
         "outgo",
     )
-    ind_selected_curr_cont = create_delta_card(
-        selected_current_cont / 1_000_000,
-        selected_prev_cont / 1_000_000,
+    ind_curr_cont = delta_card(
+        data_all["current_cont_scaled"],
+        data_all["prev_cont_scaled"],
         ".1f",
         "m",
         "income",
     )
-    ind_selected_curr_avg_claim = create_delta_card(
-        selected_current_avg_claim, selected_prev_avg_claim, ".1f", "", "outgo"
+    ind_curr_avg_claim = delta_card(
+        data_all["current_avg_claim"], data_all["prev_avg_claim"], ".1f", "", "outgo"
     )
-    ind_selected_curr_num_claim = create_delta_card(
-        selected_current_num_claim, selected_prev_num_claim, ",.0f", "", "outgo"
+    ind_curr_num_claim = delta_card(
+        data_all["current_num_lives"], data_all["prev_num_lives"], ",.0f", "", "outgo"
     )
 
+    reprice_date = data_all["reprice_date"]
+    reprice_mnths = data_all["reprice_mnths"]
+
     # Check if reprice_date is a string (blank or 'NA')
     if (
         pd.isna(reprice_date)
@@ -967,38 +914,17 @@ def update_data(selected_product):
         )
 
     # box plot - all
-    box_curr_lossRatio, _ = create_box((current_lossRatio - prev_lossRatio) * 100)
-    box_curr_claim, _ = create_box((current_claim - prev_claim) / 1_000_000)
-    box_curr_cont, _ = create_box((current_cont - prev_cont) / 1_000_000)
-    box_curr_num_claim, _ = create_box((current_num_claim - prev_num_claim) / 1_000_000)
-    box_curr_avg_claim, _ = create_box((current_avg_claim - prev_avg_claim) / 1_000_000)
-
-    # box plot - selected
-    box_selected_curr_lossRatio, _ = create_box(
-        (selected_current_lossRatio - selected_prev_lossRatio) * 100
-    )
-    box_selected_curr_claim, _ = create_box(
-        (selected_current_claim - selected_prev_claim) / 1_000_000
-    )
-    box_selected_curr_cont, _ = create_box(
-        (selected_current_cont - selected_prev_cont) / 1_000_000
-    )
-    box_selected_curr_num_claim, _ = create_box(
-        (selected_current_num_claim - selected_prev_num_claim) / 1_000_000
-    )
-    box_selected_curr_avg_claim, _ = create_box(
-        (selected_current_avg_claim - selected_prev_avg_claim) / 1_000_000
-    )
+    box_curr_lossRatio, _ = box(data_all["delta_lossRatio_scaled"], "lossRatio")
+    box_curr_claim, _ = box(data_all["pct_delta_claim_scaled"], "claim")
+    box_curr_cont, _ = box(data_all["pct_delta_cont_scaled"], "cont")
+    box_curr_num_claim, _ = box(data_all["pct_delta_num_lives_scaled"], "num_lives")
+    box_curr_avg_claim, _ = box(data_all["pct_delta_avg_claim_scaled"], "avg_claim")
 
     # bullet chart
-    bullet_curr_loss_ratio = create_bullet(current_lossRatio)
-    bullet_selected_curr_loss_ratio = create_bullet(selected_current_lossRatio)
+    bullet_curr_loss_ratio = bullet(data_all["current_lossRatio"])
 
     # fan chart
-    fan_chart = create_fan()
-
-    # product title
-    product_title = f"{selected_product} Product:"
+    fan_chart = fan(published_projection("All", version, period))
 
     return (
         # all loss ratios
@@ -1021,21 +947,257 @@ def update_data(selected_product):
         formatted_reprice_date,
         formatted_reprice_mnths,
         fan_chart,
-        product_title,
-        # selected loss ratios
-        ind_selected_current_lossRatio,
-        bullet_selected_curr_loss_ratio,
-        box_selected_curr_lossRatio,
-        # selected contributions
-        ind_selected_curr_cont,
-        box_selected_curr_cont,
-        # selected claims
-        ind_selected_curr_claim,
-        box_selected_curr_claim,
-        # all num of claims
-        ind_selected_curr_num_claim,
-        box_selected_curr_num_claim,
-        # all average claim
-        ind_selected_curr_avg_claim,
-        box_selected_curr_avg_claim,
     )
+
+
+@dash.callback(
+    [
+        # all loss ratios
+        Output("curr-lossRatio", "figure"),
+        Output("bullet-curr-lossRatio", "figure"),
+        Output("box-curr-lossRatio", "figure"),
+        # all contribution
+        Output("curr-cont", "figure"),
+        Output("box-curr-cont", "figure"),
+        # all claims
+        Output("curr-claim", "figure"),
+        Output("box-curr-claim", "figure"),
+        # all number of claims
+        Output("num-claim", "figure"),
+        Output("box-curr-num-claim", "figure"),
+        # all average claims
+        Output("avg-curr-claim", "figure"),
+        Output("box-curr-avg-claim", "figure"),
+        # all others
+        Output("overview-reprice-date", "children"),
+        Output("overview-reprice-mnths", "children"),
+        Output("fan-chart", "figure"),
+        Output("projection-poll", "disabled"),
+    ],
+    [Input("data-version", "data"), Input("selected-period", "value")],
+)
+@instrumented
+def update_all_data(version, period):
+    # The data-version Input only triggers a rebuild; the panel is keyed on
+    # the version of the snapshot this request is pinned to, which is what it
+    # is built from. A pending projection batch starts the poll below.
+    version = data_store.data_version
+    projected = projections_ready(version)
+    with stage("build"):
+        panel = build_all_panel(version, data_store.study_period(period), projected)
+    return (*panel, projected)
+
+
+@dash.callback(
+    [
+        Output("fan-chart", "figure", allow_duplicate=True),
+        Output("projection-poll", "disabled", allow_duplicate=True),
+    ],
+    [Input("projection-poll", "n_intervals")],
+    [State("selected-period", "value")],
+    prevent_initial_call=True,
+)
+@instrumented
+def update_pending_fan(n_intervals, period):
+    # Swap in the fan chart once the projection batch has been published
+    version = data_store.data_version
+    if not projections_ready(version):
+        raise PreventUpdate
+    with stage("build"):
+        panel = build_all_panel(version, data_store.study_period(period), True)
+    return panel[-1], True
+
+
+# Selected product delta cards, in the order of SELECTED_CARD_OUTPUTS:
+# (current column, previous column, format, suffix, direction)
+SELECTED_CARDS = [
+    ("current_lossRatio_scaled", "prev_lossRatio_scaled", ".1f", "%", "outgo"),
+    ("current_cont_scaled", "prev_cont_scaled", ".1f", "m", "income"),
+    ("current_claim_scaled", "prev_claim_scaled", ".1f", "m", "outgo"),
+    ("current_num_lives", "prev_num_lives", ",.0f", "", "outgo"),
+    ("current_avg_claim", "prev_avg_claim", ".1f", "", "outgo"),
+]
+
+# Selected product box plots, in the order of SELECTED_BOX_OUTPUTS:
+# (metrics column, distribution)
+SELECTED_BOXES = [
+    ("delta_lossRatio_scaled", "lossRatio"),
+    ("pct_delta_cont_scaled", "cont"),
+    ("pct_delta_claim_scaled", "claim"),
+    ("pct_delta_num_lives_scaled", "num_lives"),
+    ("pct_delta_avg_claim_scaled", "avg_claim"),
+]
+
+# Metric columns shipped per product to the browser: each card's current and
+# previous value, the bullet gauge value, then each box plot's change (each
+# followed in the payload by the box plots' rank texts)
+PRODUCT_METRIC_COLUMNS = (
+    [column for card in SELECTED_CARDS for column in card[:2]]
+    + ["current_lossRatio"]
+    + [column for column, _ in SELECTED_BOXES]
+)
+
+
+def selected_card_payload(data_selected):
+
+    # Numeric inputs of the selected product's delta cards, each as the
+    # delta_card arguments, plus the bullet gauge value
+    return {
+        "cards": [
+            [data_selected[curr], data_selected[prev], format, suffix, direction]
+            for curr, prev, format, suffix, direction in SELECTED_CARDS
+        ],
+        "bullet": data_selected["current_lossRatio"],
+    }
+
+
+@counted_cache("product_metrics", maxsize=32)
+def build_product_metrics(version, period=None):
+
+    # Card and box plot inputs for every product in one compact payload,
+    # read straight from the metric records of the study period, plus the
+    # box plot distributions' display samples, which are fixed per data
+    # version. Ranks are resolved here, so the full sorted distributions
+    # stay on the server. The browser resolves dropdown changes from it.
+    records = data_store.period_metrics(period)
+    distributions = data_store.distributions
+    return {
+        "version": version,
+        "period": period,
+        "cards": [list(card[2:]) for card in SELECTED_CARDS],
+        "products": {
+            product: [record[column] for column in PRODUCT_METRIC_COLUMNS]
+            + [
+                rank_text(
+                    distribution_rank(distributions[metric], record[column]), "th%"
+                )
+                for column, metric in SELECTED_BOXES
+            ]
+            for product, record in records.items()
+        },
+        "distributions": [
+            {
+                "points": distributions[metric]["points"].tolist(),
+                "jitter": distributions[metric]["jitter"].tolist(),
+                "quartiles": distributions[metric]["quartiles"],
+                "label": distributions[metric]["label"],
+            }
+            for _, metric in SELECTED_BOXES
+        ],
+    }
+
+
+SELECTED_CARD_OUTPUTS = [
+    Output("selected-curr-lossRatio", "figure"),
+    Output("selected-curr-cont", "figure"),
+    Output("selected-curr-claim", "figure"),
+    Output("selected-num-claim", "figure"),
+    Output("selected-avg-curr-claim", "figure"),
+    Output("selected-bullet-curr-lossRatio", "figure"),
+]
+SELECTED_BOX_OUTPUTS = [
+    Output("selected-box-curr-lossRatio", "figure"),
+    Output("selected-box-curr-cont", "figure"),
+    Output("selected-box-curr-claim", "figure"),
+    Output("selected-box-curr-num-claim", "figure"),
+    Output("selected-box-curr-avg-claim", "figure"),
+]
+
+
+@instrumented
+def update_data(selected_product, period=None, version=None):
+
+    # get selected product data
+    with stage("lookup"):
+        data_selected = get_data(selected_product, data_store.study_period(period))
+
+    # box plot - selected
+    with stage("build"):
+        box_figures = [
+            box(data_selected[column], metric)[0] for column, metric in SELECTED_BOXES
+        ]
+
+    # Delta cards and bullet chart - selected
+    with stage("build"):
+        payload = selected_card_payload(data_selected)
+        card_figures = [delta_card(*args) for args in payload["cards"]]
+        card_figures.append(bullet(payload["bullet"]))
+
+    # product title
+    product_title = f"{selected_product} Product:"
+
+    return (product_title, *card_figures, *box_figures)
+
+
+if config.CLIENTSIDE_CARDS:
+
+    @dash.callback(
+        Output("product-metrics", "data"),
+        [Input("data-version", "data"), Input("selected-period", "value")],
+        [State("product-metrics", "data")],
+    )
+    @instrumented
+    def update_product_metrics(version, period, stored):
+
+        # The browser keeps the payload across visits; only resend it when
+        # the data version or study period has moved on. As for the "All"
+        # panel, the version is the pinned snapshot's, not the browser's.
+        version, period = data_store.data_version, data_store.study_period(period)
+        if (
+            stored
+            and stored.get("version") == version
+            and stored.get("period") == period
+        ):
+            raise PreventUpdate
+        with stage("build"):
+            return build_product_metrics(version, period)
+
+    # Product switching is resolved in the browser from the metrics store,
+    # then the delta cards, bullet gauge and box plots are built by
+    # assets/main.js
+    dash.clientside_callback(
+        ClientsideFunction(namespace="overview", function_name="selectProduct"),
+        [
+            Output("selected-product-display", "children"),
+            Output("selected-metrics", "data"),
+        ],
+        [Input("selected-product", "value"), Input("product-metrics", "data")],
+    )
+    dash.clientside_callback(
+        ClientsideFunction(namespace="overview", function_name="renderCards"),
+        SELECTED_CARD_OUTPUTS,
+        [Input("selected-metrics", "data")],
+        [State("figure-template", "data")],
+    )
+    dash.clientside_callback(
+        ClientsideFunction(namespace="overview", function_name="renderBoxes"),
+        SELECTED_BOX_OUTPUTS,
+        [Input("selected-metrics", "data")],
+        [State("product-metrics", "data"), State("figure-template", "data")],
+    )
+else:
+    dash.callback(
+        [
+            Output("selected-product-display", "children"),
+            *SELECTED_CARD_OUTPUTS,
+            *SELECTED_BOX_OUTPUTS,
+        ],
+        [
+            Input("selected-product", "value"),
+            Input("selected-period", "value"),
+            Input("data-version", "data"),
+        ],
+    )(update_data)
+
+
+@on_reload
+def warm_overview(version):
+
+    # Build the reloaded data's default panels before it is swapped in
+    build_all_panel.cache_clear()
+    build_product_metrics.cache_clear()
+
+    latest = data_store.period_columns[-1]
+    build_all_panel(version, latest, projections_ready(version))
+    if config.CLIENTSIDE_CARDS:
+        build_product_metrics(version, latest)
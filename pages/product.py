@@ -1,75 +1,136 @@
-from dash import Dash, html, dcc, Input, Output, dash_table
+from dash import Dash, html, dcc, Input, Output, State, Patch, dash_table
+from dash.exceptions import PreventUpdate
+from functools import lru_cache
 import dash
 import plotly.graph_objs as go
+import numpy as np
 import pandas as pd
 
+import config
+import fast_figures
+import data_store
+import sql_store
+from hot_reload import on_reload
+from instrumentation import instrumented, stage
+
 # register page in directory
 dash.register_page(__name__, path="/product")
 
-# --------------------------------------------------
-# Data Processing
-# --------------------------------------------------
-# Data read
-data_chart = pd.read_excel("data.xlsx", sheet_name="Sheet1")
-data_table = pd.read_excel("data.xlsx", sheet_name="Sheet2")
 
-# Convert to percentage
-data_chart[["21Q1", "22Q1", "Current"]] = data_chart[["21Q1", "22Q1", "Current"]] * 100
+def chart_data():
+    # Loss ratio per product and period, from the configured backend
+    if sql_store.ENABLED:
+        return sql_store.chart()
+    return data_store.data_chart
 
 
 def create_figure(selected_products=None):
+    data_chart = chart_data()
+    periods = data_store.period_columns
+
+    # One product x period table, split into the products drawn as traces
+    # and the ones folded into a percentile band
+    rows = data_chart.set_index("Product")
+    products, others = fast_figures.split_products(rows)
+
+    # WebGL traces for many products
+    if fast_figures.line_trace_type(len(products)) == "scattergl":
+        Scatter = go.Scattergl
+    else:
+        Scatter = go.Scatter
 
     # Define the data for the Plotly graph
     line_graph = go.Figure()
 
     # Add the trace for 'All' products to be prominent by default
     line_graph.add_trace(
-        go.Scatter(
-            x=["21Q1", "22Q1", "Current"],
-            y=data_chart[data_chart["Product"] == "All"].iloc[0, 1:],
+        Scatter(
+            x=periods,
+            y=rows.loc["All"],
             mode="lines+markers",
             name="All",
             line=dict(width=3),  # Make this line thicker to be more prominent
             opacity=1.0,  # Full opacity
-            text=["All"] * 3,  # Custom hover text
+            text=["All"] * len(periods),  # Custom hover text
             hoverinfo="text+y",  # Show custom text and y value on hover
         )
     )
 
     # Add a threshold line at 90%
     line_graph.add_trace(
-        go.Scatter(
-            x=["21Q1", "22Q1", "Current"],
-            y=[90, 90, 90],  # Constant value at 90%
+        Scatter(
+            x=periods,
+            y=[90] * len(periods),  # Constant value at 90%
             mode="lines",
             line=dict(color="red", width=2, dash="dash"),  # Dashed line, more prominent
             name="Threshold (90%)",
             opacity=1.0,  # Full opacity
-            text=["Threshold (90%)"] * 3,  # Custom hover text
+            text=["Threshold (90%)"] * len(periods),  # Custom hover text
             showlegend=False,  # Hide threshold line from legend
             hoverinfo="skip",  # Disable hover info for this line
         )
     )
 
-    # Add traces for each product, initially semi-transparent
-    products = data_chart["Product"].drop(
-        data_chart[data_chart["Product"] == "All"].index
-    )  # Exclude 'All' product
-
-    for product in products:
+    # Add traces for each product, initially semi-transparent; rows are read
+    # from one array rather than a Series per row
+    for product, values in zip(products.index, products.to_numpy()):
         line_graph.add_trace(
-            go.Scatter(
-                x=["21Q1", "22Q1", "Current"],
-                y=data_chart[data_chart["Product"] == product].iloc[0, 1:],
+            Scatter(
+                x=periods,
+                y=values,
                 mode="lines+markers",
                 name=product,
                 line=dict(width=2),  # Normal width
                 opacity=0.3,
-                text=[product] * 3,  # Custom hover text
+                text=[product] * len(periods),  # Custom hover text
                 hoverinfo="text+y",  # Show custom text and y value on hover
             )
         )
 
+    # Add the remaining products as a P10-P90 band around their median
+    # (no hover or clicks, so clicks still select a product)
+    if others is not None:
+        lower, middle, upper = np.nanpercentile(
+            others.to_numpy(), fast_figures.BAND_PERCENTILES, axis=0
+        )
+        name = f"Other {len(others):,} products"
+        line_graph.add_trace(
+            go.Scatter(
+                x=periods,
+                y=lower,
+                mode="lines",
+                line=dict(width=0),
+                name=name,
+                legendgroup="others",
+                showlegend=False,
+                hoverinfo="skip",
+            )
+        )
+        line_graph.add_trace(
+            go.Scatter(
+                x=periods,
+                y=upper,
+                mode="lines",
+                line=dict(width=0),
+                fill="tonexty",  # Shade down to the P10 line
+                fillcolor="rgba(128, 128, 128, 0.3)",
+                name=f"{name} (P10-P90)",
+                legendgroup="others",
+                hoverinfo="skip",
+            )
+        )
+        line_graph.add_trace(
+            go.Scatter(
+                x=periods,
+                y=middle,
+                mode="lines",
+                line=dict(color="grey", width=2, dash="dot"),
+                name=f"{name} (median)",
+                legendgroup="others",
+                hoverinfo="skip",
+            )
+        )
+
     # Set layout for the graph
     line_graph.update_layout(
         title=dict(
@@ -97,10 +158,35 @@ def create_figure(selected_products=None):
     return line_graph
 
 
+# Line graph trace styles as (opacity, line width): 'All' (the first trace),
+# every other product, and the product selected by a click
+ALL_STYLE = (1.0, 3)
+PRODUCT_STYLE = (0.3, 2)
+SELECTED_STYLE = (1.0, 4)
+
+
+def restyle_trace(patched, curve, style):
+    opacity, width = style
+    patched["data"][curve]["opacity"] = opacity
+    patched["data"][curve]["line"]["width"] = width
+
+
+@lru_cache(maxsize=2)
+def build_line_graph(version):
+
+    # Line graph of one data version (the key only separates versions)
+    if config.FAST_FIGURES:
+        return fast_figures.create_figure(chart_data())
+    return create_figure()
+
+
 # --------------------------------------------------
 # Dashboard Content Layout
 # --------------------------------------------------
 
+# Data version the layout's line graph was built from
+LAYOUT_VERSION = data_store.data_version
+
 layout = html.Div(
     [
         # Header section
@@ -129,6 +215,7 @@ layout = html.Div(
                         dcc.Link("Product", href="/product"),
                         className="selected-menu-item",
                     ),
+                    html.Li(dcc.Link("Customer", href="/customer")),
                 ]
             ),
             className="menu",
@@ -138,7 +225,13 @@ layout = html.Div(
             [
                 html.Div(
                     [
-                        dcc.Graph(id="line-graph", figure=create_figure()),
+                        dcc.Graph(
+                            id="line-graph",
+                            figure=build_line_graph(LAYOUT_VERSION),
+                        ),
+                        # Highlighted trace and the data version of the
+                        # figure it was highlighted on
+                        dcc.Store(id="line-graph-selection"),
                     ],
                     className="content-left",
                 ),
@@ -275,6 +368,58 @@ layout = html.Div(
 # --------------------------------------------------
 
 
+@dash.callback(
+    Output("line-graph", "figure"),
+    [Input("data-version", "data")],
+)
+@instrumented
+def update_line_graph(version):
+
+    # The layout holds the graph of the data loaded at start; redraw it once
+    # newer data has been swapped in
+    if version == LAYOUT_VERSION:
+        raise PreventUpdate
+    with stage("build"):
+        return build_line_graph(version)
+
+
+if config.LINE_GRAPH_HIGHLIGHT:
+
+    @dash.callback(
+        [
+            Output("line-graph", "figure", allow_duplicate=True),
+            Output("line-graph-selection", "data"),
+        ],
+        [Input("line-graph", "clickData")],
+        [State("line-graph-selection", "data"), State("data-version", "data")],
+        prevent_initial_call=True,
+    )
+    @instrumented
+    def highlight_line(clickData, selection, version):
+
+        # Restyle only the clicked trace and the one highlighted before it,
+        # so the update is the same size however many products are plotted
+        if clickData is None:
+            raise PreventUpdate
+        curve = clickData["points"][0]["curveNumber"]
+
+        # A figure redrawn for newer data has no highlight to undo
+        previous = None
+        if selection and selection["version"] == version:
+            previous = selection["curve"]
+        if curve == previous:
+            raise PreventUpdate
+
+        with stage("build"):
+            patched = Patch()
+            if previous is not None:
+                restyle_trace(
+                    patched, previous, ALL_STYLE if previous == 0 else PRODUCT_STYLE
+                )
+            restyle_trace(patched, curve, SELECTED_STYLE)
+        return patched, {"curve": curve, "version": version}
+
+
 @dash.callback(
     [
         Output("data-table", "data"),
@@ -284,9 +429,10 @@ layout = html.Div(
         Output("reprice-date", "children"),
         Output("reprice-mnths", "children"),
     ],
-    [Input("line-graph", "clickData")],
+    [Input("line-graph", "clickData"), Input("data-version", "data")],
 )
-def update_table(clickData):
+@instrumented
+def update_table(clickData, version=None):
     if clickData is None:
         # Default to "All" product
         product_name = "All"
@@ -294,37 +440,39 @@ def update_table(clickData):
         # Get the product name from the clicked point
         product_name = clickData["points"][0]["text"]
 
-    # Filter the data for the selected product
-    selected_data = data_table[data_table["Product"] == product_name]
+    # Look up the selected product in the precomputed index (or the database)
+    with stage("lookup"):
+        if sql_store.ENABLED:
+            selected_data = sql_store.current_record(product_name)
+        else:
+            selected_data = data_store.records_curr[product_name]
 
     # Prepare data for the table
     table_data = [
         {
             "Loss Ratio Component": "Net Contribution",
-            "Current": selected_data.iloc[0]["Net Contribution"],
-            "3-Yr Cumulative": selected_data.iloc[0]["3Yr Cum Net Contribution"],
+            "Current": selected_data["Net Contribution"],
+            "3-Yr Cumulative": selected_data["3Yr Cum Net Contribution"],
         },
         {
             "Loss Ratio Component": "Incurred Claim",
-            "Current": selected_data.iloc[0]["Incurred Claim"],
-            "3-Yr Cumulative": selected_data.iloc[0]["3Yr Cum Incurred Claim"],
+            "Current": selected_data["Incurred Claim"],
+            "3-Yr Cumulative": selected_data["3Yr Cum Incurred Claim"],
         },
         {
             "Loss Ratio Component": "Loss Ratio",
-            "Current": f'{selected_data.iloc[0]["Loss Ratio"]:.2%}',
-            "3-Yr Cumulative": f'{selected_data.iloc[0]["Loss Ratio.1"]:.2%}',
+            "Current": f'{selected_data["Loss Ratio"]:.2%}',
+            "3-Yr Cumulative": f'{selected_data["Loss Ratio.1"]:.2%}',
         },
     ]
 
     # Update the title to display the selected product
     product_title = f"Product: {product_name}"
 
-    num_lives = selected_data.iloc[0]["Number of Lives"]  # Number of lives
-    avg_claim = selected_data.iloc[0]["Average Claim Size"]  # Average Claim Size
-    reprice_date = selected_data.iloc[0]["Last Reprice Date"]  # Repricing Date
-    reprice_mnths = selected_data.iloc[0][
-        "Mths Since Reprice"
-    ]  # Months from Repricing Date
+    num_lives = selected_data["Number of Lives"]  # Number of lives
+    avg_claim = selected_data["Average Claim Size"]  # Average Claim Size
+    reprice_date = selected_data["Last Reprice Date"]  # Repricing Date
+    reprice_mnths = selected_data["Mths Since Reprice"]  # Months from Repricing Date
 
     # Format values
     formatted_num_lives = (
@@ -364,3 +512,9 @@ def update_table(clickData):
         formatted_reprice_date,
         formatted_reprice_mnths,
     )
+
+
+@on_reload
+def warm_line_graph(version):
+    build_line_graph.cache_clear()
+    build_line_graph(version)
@@ -0,0 +1,154 @@
+import copy
+
+import numpy as np
+
+from quantile_sketch import TDigest
+
+# --------------------------------------------------
+# Incremental Customer Profile Summaries
+# --------------------------------------------------
+# Summaries of a customer table that a spider chart can draw in place of one
+# trace per customer. Both are updated batch by batch, so new customers are
+# folded in without refitting on the customers already seen:
+#
+#   ProfileClusters  mini-batch k-means centroids and cluster sizes
+#   ProfileBands     per-axis quantile sketches for percentile envelopes
+
+
+class ProfileClusters:
+    # Mini-batch k-means (Sculley, 2010) on profiles scaled by the fixed axis
+    # ranges given up front. Each centroid is the running mean of every
+    # profile assigned to it, i.e. per-centroid learning rate 1 / count.
+
+    def __init__(self, categories, low, high, n_clusters=8, batch_size=1024, seed=0):
+        low, high = np.asarray(low, "float64"), np.asarray(high, "float64")
+        self.categories = list(categories)
+        self.low = low
+        self.span = np.where(high > low, high - low, 1.0)
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.centers = None  # Clusters x axes, scaled
+        self.counts = None  # Profiles assigned to each cluster
+        self.count = 0
+
+    def scale(self, values):
+        return (values - self.low) / self.span
+
+    def update(self, values):
+        # Profiles with a missing value are left out
+        values = np.asarray(values, dtype="float64")
+        scaled = self.scale(values[np.isfinite(values).all(axis=1)])
+
+        for start in range(0, len(scaled), self.batch_size):
+            batch = scaled[start : start + self.batch_size]
+            if self.centers is None:
+                self._initialize(batch)
+            self._step(batch)
+        return self
+
+    def _initialize(self, batch):
+        # k-means++ seeding on the first batch; a first batch smaller than
+        # n_clusters caps the number of clusters
+        centers = [batch[self.rng.integers(len(batch))]]
+        for _ in range(min(self.n_clusters, len(batch)) - 1):
+            distances = self._distances(batch, np.array(centers)).min(axis=1)
+            if distances.sum() == 0:
+                break
+            centers.append(
+                batch[self.rng.choice(len(batch), p=distances / distances.sum())]
+            )
+
+        self.centers = np.array(centers)
+        self.counts = np.zeros(len(self.centers))
+
+    @staticmethod
+    def _distances(points, centers):
+        # Squared euclidean distances, points x centers
+        return np.maximum(
+            (points**2).sum(axis=1)[:, None]
+            - 2 * points @ centers.T
+            + (centers**2).sum(axis=1)[None, :],
+            0,
+        )
+
+    def _step(self, batch):
+        labels = self._distances(batch, self.centers).argmin(axis=1)
+        n_assigned = np.bincount(labels, minlength=len(self.centers))
+        sums = np.stack(
+            [
+                np.bincount(labels, weights=batch[:, axis], minlength=len(self.centers))
+                for axis in range(batch.shape[1])
+            ],
+            axis=1,
+        )
+
+        # Running mean of everything assigned so far
+        counts = self.counts + n_assigned
+        assigned = n_assigned > 0
+        self.centers[assigned] += (
+            sums[assigned] - n_assigned[assigned, None] * self.centers[assigned]
+        ) / counts[assigned, None]
+        self.counts = counts
+        self.count += len(batch)
+
+    def predict(self, values):
+        scaled = self.scale(np.asarray(values, dtype="float64"))
+        return self._distances(scaled, self.centers).argmin(axis=1)
+
+    def centroids(self):
+        # Centroids in the profile's own units
+        return self.centers * self.span + self.low
+
+    def selection(self, values, labels):
+        # These clusters restricted to some of the profiles (labels from
+        # predict): each cluster's size and centroid over its selected
+        # members, without refitting. Clusters with no member keep their
+        # fitted centroid at size 0.
+        values = np.asarray(values, dtype="float64")
+        complete = np.isfinite(values).all(axis=1)
+        scaled, labels = self.scale(values[complete]), np.asarray(labels)[complete]
+
+        n_clusters = len(self.centers)
+        counts = np.bincount(labels, minlength=n_clusters).astype("float64")
+        sums = np.stack(
+            [
+                np.bincount(labels, weights=scaled[:, axis], minlength=n_clusters)
+                for axis in range(scaled.shape[1])
+            ],
+            axis=1,
+        )
+
+        selected = copy.copy(self)
+        selected.centers = np.where(
+            counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], self.centers
+        )
+        selected.counts = counts
+        selected.count = len(labels)
+        return selected
+
+
+class ProfileBands:
+    # One t-digest per axis; percentiles of every profile seen so far
+
+    def __init__(self, categories, compression=200):
+        self.categories = list(categories)
+        self.digests = [TDigest(compression) for _ in self.categories]
+        self.count = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64")
+        for axis, digest in enumerate(self.digests):
+            column = values[:, axis]
+            digest.update(column[np.isfinite(column)])
+        self.count += len(values)
+        return self
+
+    def percentiles(self, p):
+        # len(p) x axes array
+        return np.column_stack([digest.percentile(p) for digest in self.digests])
+
+    def extremes(self):
+        low = np.array([digest.min for digest in self.digests])
+        high = np.array([digest.max for digest in self.digests])
+        return low, high
@@ -0,0 +1,319 @@
+import os
+import zlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import config
+import data_store
+import workbook_cache
+from hot_reload import on_reload
+from quantile_sketch import TDigest
+
+# --------------------------------------------------
+# Loss Ratio Projection Engine
+# --------------------------------------------------
+# Monte Carlo projection of next period's loss ratio, driven by each
+# product's own loss ratio history. Results are cached per product and data
+# version, so the fan chart only pays for the simulation once.
+
+# Percentiles bounding the fan chart bands
+FAN_PERCENTILES = [0, 25, 50, 75, 100]
+
+# Floor on the period-over-period volatility (in % points), so a flat
+# history still produces a visible fan
+MIN_VOLATILITY = 1.0
+
+
+def product_rng(product, seed=config.FAN_SEED):
+    # Local generator per product: thread-safe, unlike the global np.random
+    # state, and independent of the order products are simulated in
+    return np.random.default_rng([seed, zlib.crc32(product.encode())])
+
+
+def change_distribution(history):
+    # Drift and volatility of the period-over-period loss ratio changes
+    changes = np.diff(np.asarray(history, dtype="float64"))
+    if len(changes) == 0:
+        return 0.0, MIN_VOLATILITY
+
+    drift = changes.mean()
+    volatility = changes.std(ddof=1) if len(changes) > 1 else abs(drift) / 2
+    return drift, max(volatility, MIN_VOLATILITY)
+
+
+def simulate_loss_ratio(history, n_sims, rng):
+    # Next period = latest loss ratio + a normally distributed change
+    drift, volatility = change_distribution(history)
+    return history[-1] + rng.normal(drift, volatility, n_sims)
+
+
+def simulate_loss_ratio_sketch(history, n_sims, rng, chunk_size, compression):
+    # Chunked version of simulate_loss_ratio for very large scenario counts:
+    # only one chunk is held in memory, and its values are folded into a
+    # mergeable quantile sketch plus a running total for the mean
+    drift, volatility = change_distribution(history)
+    digest = TDigest(compression)
+    total = 0.0
+
+    for start in range(0, n_sims, chunk_size):
+        size = min(chunk_size, n_sims - start)
+        chunk = history[-1] + rng.normal(drift, volatility, size)
+        digest.update(chunk)
+        total += chunk.sum()
+
+    return digest, total / n_sims
+
+
+def project_history(product, history, n_sims, seed):
+    # Mean and fan bands of one product's projection; a pure function of its
+    # inputs, so it can run in any process with the same result
+    rng = product_rng(product, seed)
+
+    if n_sims > config.FAN_CHUNK_SIZE:
+        digest, mean = simulate_loss_ratio_sketch(
+            history,
+            n_sims,
+            rng,
+            config.FAN_CHUNK_SIZE,
+            config.FAN_SKETCH_COMPRESSION,
+        )
+        bands = digest.percentile(FAN_PERCENTILES)
+    else:
+        projected = simulate_loss_ratio(history, n_sims, rng)
+        mean = projected.mean()
+        bands = np.percentile(projected, FAN_PERCENTILES)
+
+    return {"mean": float(mean), "bands": bands.tolist()}
+
+
+# --------------------------------------------------
+# Correlated Portfolio Projection
+# --------------------------------------------------
+# The "All" projection draws every product's loss ratio change jointly, with
+# the correlation between products estimated from their history, and
+# aggregates claims and contributions per scenario. The Cholesky factor is
+# computed once per data version.
+
+PORTFOLIO = "All"
+
+
+def correlation_matrix(changes, shrinkage):
+    # Sample correlation of the products' period-over-period changes, shrunk
+    # towards the identity: with few historical periods the raw estimate is
+    # singular, and shrinkage keeps it positive definite
+    n_products = changes.shape[0]
+    if changes.shape[1] < 2:
+        return np.eye(n_products)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sample = np.corrcoef(changes)
+    sample = np.nan_to_num(np.atleast_2d(sample), nan=0.0)
+    np.fill_diagonal(sample, 1.0)
+
+    return (1 - shrinkage) * sample + shrinkage * np.eye(n_products)
+
+
+def cholesky_factor(correlation):
+    # Add diagonal jitter until the factorization succeeds
+    jitter = 0.0
+    for _ in range(10):
+        try:
+            return np.linalg.cholesky(correlation + jitter * np.eye(len(correlation)))
+        except np.linalg.LinAlgError:
+            jitter = max(jitter * 10, 1e-10)
+    return np.eye(len(correlation))
+
+
+@lru_cache(maxsize=4)
+def portfolio_model(version, shrinkage=config.PORTFOLIO_SHRINKAGE):
+    # Products present in both the history and the current period
+    history = data_store.data_chart.set_index("Product")[data_store.period_columns]
+    contributions = data_store.data_table_curr.set_index("Product")["Net Contribution"]
+    products = [
+        product
+        for product in history.index
+        if product != PORTFOLIO and product in contributions.index
+    ]
+
+    history = history.loc[products].to_numpy(dtype="float64")
+    changes = np.diff(history, axis=1)
+
+    # Per-product drift and volatility, as in change_distribution
+    if changes.shape[1] == 0:
+        drift = np.zeros(len(products))
+        volatility = np.full(len(products), MIN_VOLATILITY)
+    elif changes.shape[1] == 1:
+        drift = changes[:, 0]
+        volatility = np.maximum(np.abs(drift) / 2, MIN_VOLATILITY)
+    else:
+        drift = changes.mean(axis=1)
+        volatility = np.maximum(changes.std(axis=1, ddof=1), MIN_VOLATILITY)
+
+    return {
+        "products": products,
+        "last": history[:, -1],
+        "drift": drift,
+        "volatility": volatility,
+        "contributions": contributions.loc[products].to_numpy(dtype="float64"),
+        "cholesky": cholesky_factor(correlation_matrix(changes, shrinkage)),
+    }
+
+
+def simulate_portfolio(model, n_sims, rng, chunk_size):
+    # Yields the portfolio loss ratio (in %) of each scenario, one chunk at a
+    # time so a chunk holds at most ~chunk_size product draws
+    n_products = len(model["products"])
+    rows = max(1, chunk_size // max(n_products, 1))
+    weights = model["contributions"] / model["contributions"].sum()
+
+    for start in range(0, n_sims, rows):
+        size = min(rows, n_sims - start)
+
+        # Correlated standard normals in one matrix product
+        shocks = rng.standard_normal((size, n_products)) @ model["cholesky"].T
+        loss_ratios = model["last"] + model["drift"] + shocks * model["volatility"]
+
+        # Claims over contributions across products, per scenario
+        yield loss_ratios @ weights
+
+
+def project_portfolio(version, n_sims, seed):
+    model = portfolio_model(version)
+    rng = product_rng(PORTFOLIO, seed)
+    chunks = simulate_portfolio(model, n_sims, rng, config.FAN_CHUNK_SIZE)
+
+    if n_sims > config.FAN_CHUNK_SIZE:
+        digest = TDigest(config.FAN_SKETCH_COMPRESSION)
+        total = 0.0
+        for chunk in chunks:
+            digest.update(chunk)
+            total += chunk.sum()
+        mean, bands = total / n_sims, digest.percentile(FAN_PERCENTILES)
+    else:
+        projected = np.concatenate(list(chunks))
+        mean, bands = projected.mean(), np.percentile(projected, FAN_PERCENTILES)
+
+    return {"mean": float(mean), "bands": bands.tolist()}
+
+
+# --------------------------------------------------
+# Shared Projection Cache
+# --------------------------------------------------
+# Batch runs (projection_runner.py) write every product's projection from
+# the latest period, and the portfolio's from each earlier one, to a Parquet
+# file per data version, simulation count and seed. The dashboard reads from
+# it, so no simulation runs while a request is in flight; until the batch is
+# there, its fan charts show the history alone.
+
+
+def projection_cache_path(version, n_sims, seed):
+    return os.path.join(
+        config.CACHE_DIR, f"{version}-projections-{n_sims}-{seed}.parquet"
+    )
+
+
+def save_projections(projections, version, n_sims, seed):
+    # projections: (period projected from, product) -> summary
+    table = pd.DataFrame(
+        [[summary["mean"], *summary["bands"]] for summary in projections.values()],
+        index=pd.MultiIndex.from_tuples(list(projections), names=["Period", "Product"]),
+        columns=["mean"] + [f"p{p}" for p in FAN_PERCENTILES],
+    )
+
+    os.makedirs(config.CACHE_DIR, exist_ok=True)
+    workbook_cache.atomic_write(
+        projection_cache_path(version, n_sims, seed), table.to_parquet
+    )
+    _read_projections.cache_clear()
+
+
+def load_projections(version, n_sims, seed):
+    # The file is checked on every call and its contents cached per
+    # mtime/size, so a missing batch is not remembered as empty, and one
+    # written later (e.g. by projection_runner.py) is picked up
+    path = projection_cache_path(version, n_sims, seed)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {}
+    return _read_projections(path, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=8)
+def _read_projections(path, mtime_ns, size):
+    try:
+        table = pd.read_parquet(path)
+    except (ImportError, ValueError, OSError):
+        return {}
+
+    return {
+        key: {"mean": row[0], "bands": list(row[1:])}
+        for key, row in zip(table.index, table.to_numpy().tolist())
+    }
+
+
+def projections_ready(version, n_sims=config.FAN_SIMULATIONS, seed=config.FAN_SEED):
+    return bool(load_projections(version, n_sims, seed))
+
+
+def loss_ratio_history(product, period=None):
+    # Study periods up to the one projected from (by default the latest) and
+    # the product's loss ratios (in %) over them
+    periods = list(data_store.period_columns)
+    if period in periods:
+        periods = periods[: periods.index(period) + 1]
+    record = data_store.records_chart[product]
+    return periods, [record[column] for column in periods]
+
+
+def published_projection(
+    product, version, period=None, n_sims=config.FAN_SIMULATIONS, seed=config.FAN_SEED
+):
+    # Projection for a request: read from the batch only, never simulated.
+    # Until the batch is published, the mean and bands are None.
+    periods, history = loss_ratio_history(product, period)
+    summary = load_projections(version, n_sims, seed).get((periods[-1], product))
+    return {
+        "periods": periods,
+        "history": history,
+        **(summary or {"mean": None, "bands": None}),
+    }
+
+
+@lru_cache(maxsize=1024)
+def project_loss_ratio(
+    product, version, n_sims=config.FAN_SIMULATIONS, seed=config.FAN_SEED, period=None
+):
+    # Projection from the batch if it has one, otherwise simulated here
+    # (outside requests: batch runs, benchmarks). The correlated portfolio
+    # projection starts from the latest period.
+    periods, history = loss_ratio_history(product, period)
+    latest = len(periods) == len(data_store.period_columns)
+
+    summary = load_projections(version, n_sims, seed).get((periods[-1], product))
+    if (
+        summary is None
+        and latest
+        and product == PORTFOLIO
+        and config.PORTFOLIO_CORRELATED
+    ):
+        summary = project_portfolio(version, n_sims, seed)
+    if summary is None:
+        summary = project_history(product, history, n_sims, seed)
+
+    # Only the summary is kept, so cached projections stay small
+    return {
+        "periods": periods,
+        "history": history,
+        **summary,
+    }
+
+
+@on_reload
+def clear_projections(version):
+    # Projections are keyed on the data version; drop the old version's
+    project_loss_ratio.cache_clear()
+    portfolio_model.cache_clear()
+    _read_projections.cache_clear()
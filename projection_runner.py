@@ -0,0 +1,116 @@
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+import data_store
+from hot_reload import on_reload, on_start
+from projection import (
+    PORTFOLIO,
+    load_projections,
+    loss_ratio_history,
+    project_history,
+    project_portfolio,
+    save_projections,
+)
+
+# --------------------------------------------------
+# Batch Projection Runner
+# --------------------------------------------------
+# Projects every product and segment from the latest period, and the
+# portfolio from each earlier one (the overview's study period dropdown),
+# across a process pool and writes the results to the shared projection
+# cache. Each product draws from its own stream seeded by (seed, product
+# name), so results are identical whatever the worker count or scheduling
+# order.
+#
+# python projection_runner.py [--workers N] [--simulations N] [--seed N]
+
+
+def _project(task):
+    (period, product), history, n_sims, seed = task
+    return (period, product), project_history(product, history, n_sims, seed)
+
+
+def run_projections(histories, n_sims, seed, workers=config.PROJECTION_WORKERS):
+    # histories: (period projected from, product) -> loss ratio history
+    tasks = [(key, history, n_sims, seed) for key, history in histories.items()]
+
+    if workers <= 1:
+        return dict(map(_project, tasks))
+
+    # Hand products to workers in batches to keep IPC overhead low. Workers
+    # are spawned, not forked, which is safe from the server's threads.
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return dict(executor.map(_project, tasks, chunksize=chunksize))
+
+
+def refresh_projections(
+    version=None,
+    n_sims=config.FAN_SIMULATIONS,
+    seed=config.FAN_SEED,
+    workers=config.PROJECTION_WORKERS,
+    force=False,
+):
+    # Project every product of the loaded data, unless the shared cache
+    # already holds this data version
+    version = version or data_store.data_version
+    if not force and load_projections(version, n_sims, seed):
+        return False
+
+    latest = data_store.period_columns[-1]
+    histories = {
+        (latest, product): [record[period] for period in data_store.period_columns]
+        for product, record in data_store.records_chart.items()
+    }
+    if PORTFOLIO in data_store.records_chart:
+        for period in data_store.period_columns[:-1]:
+            histories[period, PORTFOLIO] = loss_ratio_history(PORTFOLIO, period)[1]
+    projections = run_projections(histories, n_sims, seed, workers)
+
+    # The latest portfolio total is simulated jointly across the correlated
+    # products
+    if config.PORTFOLIO_CORRELATED and (latest, PORTFOLIO) in histories:
+        projections[latest, PORTFOLIO] = project_portfolio(version, n_sims, seed)
+
+    save_projections(projections, version, n_sims, seed)
+    return True
+
+
+@on_start
+def project_loaded_data():
+    # Fill the shared cache in the background after start; the fan chart
+    # shows the history alone until it is there (a no-op once the batch has
+    # been run)
+    refresh_projections()
+
+
+@on_reload
+def project_reloaded_data(version):
+    # Fill the shared cache for a reloaded workbook before it is swapped in
+    refresh_projections(version)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Project all products")
+    parser.add_argument("--workers", type=int, default=config.PROJECTION_WORKERS)
+    parser.add_argument("--simulations", type=int, default=config.FAN_SIMULATIONS)
+    parser.add_argument("--seed", type=int, default=config.FAN_SEED)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    refreshed = refresh_projections(
+        n_sims=args.simulations,
+        seed=args.seed,
+        workers=args.workers,
+        force=args.force,
+    )
+    elapsed = time.perf_counter() - start
+
+    status = "projected" if refreshed else "already cached"
+    print(f"{len(data_store.records_chart)} products {status} in {elapsed:.2f}s")
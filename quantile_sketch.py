@@ -0,0 +1,75 @@
+import numpy as np
+
+# --------------------------------------------------
+# Mergeable Quantile Sketch
+# --------------------------------------------------
+# A merging t-digest: values are folded into at most ~compression / 2
+# weighted centroids, small at the tails and larger around the median, so
+# tail percentiles stay accurate while memory is independent of the number
+# of values seen. Two digests merge by combining their centroids, which lets
+# chunked or parallel simulations be summarized piece by piece.
+
+
+class TDigest:
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64").ravel()
+        if values.size == 0:
+            return self
+
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compress(values, np.ones_like(values))
+        return self
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(other.means, other.weights)
+        return self
+
+    def _compress(self, means, weights):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        # Position of each point's centre on the k1 scale,
+        # k(q) = compression / (2 pi) * asin(2q - 1), shifted to start at 0
+        total = weights.sum()
+        q_centre = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_centre - 1)
+        cluster = np.floor(k - k[0]).astype(np.int64)
+
+        # Points falling in the same unit of k-space share one centroid
+        _, cluster = np.unique(cluster, return_inverse=True)
+        merged_weights = np.bincount(cluster, weights=weights)
+        merged_sums = np.bincount(cluster, weights=means * weights)
+
+        self.means = merged_sums / merged_weights
+        self.weights = merged_weights
+        self.count = total
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan)
+
+        # Interpolate between centroid centres, anchored at the exact min/max
+        centres = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0.0], centres, [self.count]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(np.asarray(q) * self.count, positions, values)
+
+    def percentile(self, p):
+        return self.quantile(np.asarray(p) / 100)
@@ -1,19 +1,28 @@
-import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
 
-file_path = r"C:\Users\ibrah\OneDrive\Documents\Projects\Experience_Monitoring_Dashboard\data_2.xlsx"
-df = pd.read_excel(file_path)
+import config
+import workbook_cache
+from profile_clusters import ProfileBands, ProfileClusters
 
-# Mapping categorical data to numbers
-df["Most Rider"] = df["Most Rider"].map({"Medical Rider": 2, "CI Rider": 1})
+# --------------------------------------------------
+# Customer Profile Spider Chart
+# --------------------------------------------------
+# One closed polar profile per customer over the profile columns of the
+# customer workbook (every column after the first, which names the profile).
+# Normalization is a single array operation over the whole customer table,
+# so the chart scales with the number of customers without per-row Python.
+# Very large tables can be drawn as cluster centroids or percentile bands
+# instead (SPIDER_MODE, see profile_clusters.py).
 
-categories = df.iloc[:, 1:].columns
-customer = df.iloc[:, 0]
+CUSTOMER_SHEET = "Sheet1"
 
-df_plot = df.drop(columns=["Date"])
+# Mapping categorical data to numbers
+RIDER_CODES = {"Medical Rider": 2, "CI Rider": 1}
 
 # Define custom ranges for each axis based on the scale of each variable
-custom_ranges = {
+CUSTOM_RANGES = {
     "Age": [0, 100],
     "Sum Assured": [0, 50000],  # Adjust based on your dataset
     "Contribution": [0, 500],  # Adjust based on your dataset
@@ -22,46 +31,239 @@ custom_ranges = {
     "Most Rider": [1, 2],
 }
 
-# Create the spider chart using the normalized data
-fig = go.Figure()
 
-# Loop through each row to plot each customer profile
-for i, row in df_plot.iterrows():
-    # Extract actual values for hover data
-    actual_values = row.tolist()
+def load_customers(path=config.CUSTOMER_FILE):
+    # Parsed once per workbook content, like the experience workbook. A
+    # Parquet file (e.g. the customers.parquet of generate_data.py) is read
+    # directly, and is not capped at Excel's 1,048,576 rows.
+    if str(path).endswith(".parquet"):
+        customers = pd.read_parquet(path)
+    else:
+        frames, _ = workbook_cache.read_workbook(path, [CUSTOMER_SHEET])
+        customers = frames[CUSTOMER_SHEET]
+    customers["Most Rider"] = customers["Most Rider"].map(RIDER_CODES)
+    return customers
 
-    # Normalize the data using the custom ranges for plotting
-    normalized_values = []
-    for category in categories:
-        normalized_value = (row[category] - custom_ranges[category][0]) / (
-            custom_ranges[category][1] - custom_ranges[category][0]
-        )
-        normalized_values.append(normalized_value)
+
+def axis_ranges(values, categories, quantile=config.SPIDER_RANGE_QUANTILE):
+    # (low, high) arrays, one entry per axis: the [q, 1 - q] quantiles of the
+    # data, or CUSTOM_RANGES, with the data's min/max for unlisted columns
+    if quantile > 0:
+        low, high = np.nanquantile(values, [quantile, 1 - quantile], axis=0)
+        return low, high
+
+    return fixed_ranges(
+        categories, np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+    )
+
+
+def fixed_ranges(categories, low, high):
+    low, high = low.copy(), high.copy()
+    for i, category in enumerate(categories):
+        if category in CUSTOM_RANGES:
+            low[i], high[i] = CUSTOM_RANGES[category]
+    return low, high
+
+
+def normalize(values, low, high):
+    # Customers x axes values scaled to 0-1; constant axes map to 0
+    span = np.where(high > low, high - low, 1.0)
+    return (values - low) / span
+
+
+def profile_values(customers):
+    # Profile names, axis names and the customers x axes value array
+    names = customers.iloc[:, 0].astype(str).to_numpy()
+    categories = list(customers.columns[1:])
+    return names, categories, customers[categories].to_numpy(dtype="float64")
+
+
+def create_spider_chart(customers, ranges=None, mode=config.SPIDER_MODE):
+    if mode != "profiles":
+        return create_summary_chart(summarize(customers, mode=mode), ranges)
+
+    names, categories, values = profile_values(customers)
+
+    low, high = ranges or axis_ranges(values, categories)
+    normalized = normalize(values, low, high)
 
     # Close the loop for both normalized and actual values
-    normalized_values += [normalized_values[0]]
-    actual_values += [actual_values[0]]
+    r = np.hstack([normalized, normalized[:, :1]])
+    actual = np.hstack([values, values[:, :1]])
+
+    if len(customers) <= config.SPIDER_TRACE_LIMIT:
+        theta = categories + categories[:1]
+        fig = go.Figure(
+            [
+                go.Scatterpolar(
+                    r=r_row,
+                    theta=theta,
+                    fill="toself",
+                    name=name,
+                    customdata=actual_row,  # Actual (non-normalized) values
+                    hovertemplate="%{theta}: %{customdata}",
+                )
+                for name, r_row, actual_row in zip(names, r, actual)
+            ]
+        )
+        angularaxis = {}
+    else:
+        # Every profile in one WebGL trace, the loops separated by gaps.
+        # Axes are placed by angle, so theta ships as numbers, not labels.
+        angles = np.arange(len(categories) + 1) * 360 / len(categories)
+        gap = np.full((len(r), 1), np.nan)
+        fig = go.Figure(
+            go.Scatterpolargl(
+                r=np.hstack([r, gap]).ravel(),
+                theta=np.tile(np.append(angles, np.nan), len(r)),
+                mode="lines",
+                line={"width": 1},
+                opacity=0.3,
+                name=f"{len(customers):,} customers",
+                customdata=np.hstack([actual, gap]).ravel(),
+                hovertemplate="%{customdata}",
+            )
+        )
+        angularaxis = {
+            "tickmode": "array",
+            "tickvals": angles[:-1],
+            "ticktext": categories,
+        }
+
+    return _polar_layout(fig, angularaxis)
+
+
+def _polar_layout(fig, angularaxis=None):
+    # Update layout for better visualization
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True, range=[0, 1]
+            ),  # Normalized range 0-1 for all axes
+            angularaxis=angularaxis or {},
+        ),
+        showlegend=True,
+    )
+    return fig
+
+
+# --------------------------------------------------
+# Aggregated Modes
+# --------------------------------------------------
+
+
+def summarize(customers, summary=None, mode=config.SPIDER_MODE):
+    # New customers are folded into an existing summary, without refitting
+    # on the customers it has already seen
+    names, categories, values = profile_values(customers)
+
+    if summary is None:
+        if mode == "clusters":
+            # Cluster distances are measured on the chart's 0-1 scale
+            low, high = axis_ranges(values, categories)
+            summary = ProfileClusters(
+                categories, low, high, config.SPIDER_CLUSTERS, seed=config.FAN_SEED
+            )
+        elif mode == "bands":
+            summary = ProfileBands(categories, config.FAN_SKETCH_COMPRESSION)
+        else:
+            raise ValueError(f"Unknown spider chart mode: {mode}")
+
+    return summary.update(values)
+
+
+def create_summary_chart(summary, ranges=None):
+    if isinstance(summary, ProfileClusters):
+        return create_cluster_chart(summary)
+    return create_band_chart(summary, ranges)
+
+
+def create_cluster_chart(clusters):
+    # One filled loop per centroid, sized by its share of the customers
+    categories = clusters.categories
+    theta = categories + categories[:1]
+    r = np.hstack([clusters.centers, clusters.centers[:, :1]])
+    actual = clusters.centroids()
+    actual = np.hstack([actual, actual[:, :1]])
+    shares = clusters.counts / max(clusters.counts.sum(), 1)
+
+    fig = go.Figure(
+        [
+            go.Scatterpolar(
+                r=r[i],
+                theta=theta,
+                fill="toself",
+                opacity=0.35 + 0.65 * shares[i],
+                name=f"Cluster {i + 1}",
+                customdata=actual[i],
+                hovertemplate=(
+                    f"%{{theta}}: %{{customdata:,.4g}}<br>"
+                    f"{clusters.counts[i]:,.0f} customers"
+                ),
+            )
+            for i in np.argsort(-clusters.counts)
+            if clusters.counts[i] > 0
+        ]
+    )
+    return _polar_layout(fig)
+
+
+def band_ranges(bands, quantile=config.SPIDER_RANGE_QUANTILE):
+    # Same axes as axis_ranges, from the sketches instead of the raw values
+    if quantile > 0:
+        low, high = bands.percentiles([quantile * 100, (1 - quantile) * 100])
+        return low, high
+    return fixed_ranges(bands.categories, *bands.extremes())
+
+
+# Percentile envelopes drawn by the band chart, outermost first
+BANDS = [(10, 90), (25, 75)]
+
 
+def create_band_chart(bands, ranges=None):
+    categories = bands.categories
+    theta = categories + categories[:1]
+    low, high = ranges or band_ranges(bands)
+
+    def loop(values):
+        values = np.append(values, values[0])
+        return normalize(values, np.append(low, low[0]), np.append(high, high[0]))
+
+    fig = go.Figure()
+    for lower, upper in BANDS:
+        inner, outer = bands.percentiles([lower, upper])
+
+        # The outer loop followed by the inner one reversed fills the ring
+        # between the two percentiles
+        fig.add_trace(
+            go.Scatterpolar(
+                r=np.concatenate([loop(outer), loop(inner)[::-1]]),
+                theta=theta + theta[::-1],
+                fill="toself",
+                mode="lines",
+                line={"width": 0},
+                opacity=0.3,
+                name=f"P{lower}-P{upper}",
+                hoverinfo="skip",
+            )
+        )
+
+    median = bands.percentiles([50])[0]
     fig.add_trace(
         go.Scatterpolar(
-            r=normalized_values,
-            theta=categories.tolist() + [categories[0]],
-            fill="toself",
-            name=customer[i],
-            customdata=[actual_values],  # Pass the actual (non-normalized) values
-            hovertemplate="%{theta}: %{customdata[theta]}",  # Show actual values in the hover
+            r=loop(median),
+            theta=theta,
+            mode="lines+markers",
+            name="Median",
+            customdata=np.append(median, median[0]),
+            hovertemplate=(
+                f"%{{theta}}: %{{customdata:,.4g}}<br>{bands.count:,} customers"
+            ),
         )
     )
+    return _polar_layout(fig)
+
 
-# Update layout for better visualization
-fig.update_layout(
-    polar=dict(
-        radialaxis=dict(
-            visible=True, range=[0, 1]
-        ),  # Normalized range 0-1 for all axes
-    ),
-    showlegend=True,
-)
-
-# Show the figure in Dash or standalone
-fig.show()
+if __name__ == "__main__":
+    # Show the figure standalone
+    create_spider_chart(load_customers()).show()
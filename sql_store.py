@@ -0,0 +1,230 @@
+import os
+import re
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+import config
+import data_store
+from hot_reload import on_reload
+
+# --------------------------------------------------
+# SQLite Query Backend
+# --------------------------------------------------
+# Optional storage backend (DASHBOARD_QUERY_BACKEND=sqlite). Each data
+# version is written once to an SQLite file in CACHE_DIR, indexed on product
+# and period, and the callbacks query it instead of filtering DataFrames:
+#
+#   experience     long (period, product, metric, value) rows of every period
+#   metrics        get_data rows, one per (period, product)
+#   current_period Sheet2 rows used by update_table
+#   periods        study periods in order
+#
+# Every thread of every worker process keeps one read-only connection to the
+# current version's file. The file is built when the data is loaded, at start
+# or on reload, never by a request.
+
+ENABLED = config.QUERY_BACKEND == "sqlite"
+
+# Metrics table columns holding dates, returned as Timestamps
+DATE_COLUMNS = {"reprice_date", "Last Reprice Date"}
+
+# Version databases kept in CACHE_DIR on reload: the new one and the one
+# other workers may still be serving until they reload too
+KEEP_DATABASES = 2
+
+# File names of version databases (database_path), as opposed to other
+# SQLite files in CACHE_DIR, e.g. the benchmark's
+VERSION_DATABASE = re.compile(r"[0-9a-f]{16}\.sqlite")
+
+# Data versions this process has loaded, oldest first
+loaded_versions = []
+
+_build_lock = threading.Lock()
+_local = threading.local()
+
+
+def database_path(version):
+    return os.path.join(config.CACHE_DIR, f"{version}.sqlite")
+
+
+def build_database(path, snapshot):
+    # Written to a temporary file and renamed, so readers in other workers
+    # never open a half-built database
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    connection = sqlite3.connect(tmp_path)
+    try:
+        periods = snapshot.periods
+
+        pd.DataFrame(
+            {"position": range(len(periods.periods)), "period": periods.periods}
+        ).to_sql("periods", connection, index=False)
+
+        experience = periods.long().rename(columns=str.lower)
+        experience["period"] = experience["period"].astype(str)
+        experience["product"] = experience["product"].astype(str)
+        experience.to_sql("experience", connection, index=False, chunksize=100_000)
+
+        for period in periods.periods:
+            if period == periods.periods[-1]:
+                metrics = snapshot.metrics
+            else:
+                metrics = data_store.period_metrics_table(periods, period)
+            metrics = metrics.reset_index()
+            metrics.insert(0, "period", period)
+            metrics.to_sql("metrics", connection, index=False, if_exists="append")
+
+        snapshot.data_table_curr.to_sql("current_period", connection, index=False)
+
+        connection.executescript(
+            """
+            CREATE INDEX experience_product ON experience (product, period);
+            CREATE INDEX experience_period ON experience (period, metric);
+            CREATE UNIQUE INDEX metrics_key ON metrics (Product, period);
+            CREATE UNIQUE INDEX current_product ON current_period (Product);
+            ANALYZE;
+            """
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+    os.replace(tmp_path, path)
+
+
+def ensure_database(snapshot=None):
+    snapshot = snapshot or data_store.current()
+    path = database_path(snapshot.data_version)
+    if not os.path.exists(path):
+        with _build_lock:
+            if not os.path.exists(path):
+                os.makedirs(config.CACHE_DIR, exist_ok=True)
+                build_database(path, snapshot)
+    return path
+
+
+def prune_databases(keep=KEEP_DATABASES):
+    # Remove version databases other than the served version's and those of
+    # the `keep` versions loaded last
+    kept = set(loaded_versions[-keep:]) | {data_store.published().data_version}
+    for name in os.listdir(config.CACHE_DIR):
+        if VERSION_DATABASE.fullmatch(name) and name[: -len(".sqlite")] not in kept:
+            try:
+                os.remove(os.path.join(config.CACHE_DIR, name))
+            except OSError:
+                pass  # Already removed by another worker
+
+
+def connection():
+    # Read-only connection of this thread to the current version's database,
+    # reopened when the version changes or in a forked worker
+    key = (os.getpid(), database_path(data_store.data_version))
+    previous = getattr(_local, "key", None)
+
+    if previous != key:
+        # Only builds if the file has gone missing since the data was loaded
+        ensure_database()
+
+        # A connection inherited from the parent process is left to it
+        if previous is not None and previous[0] == key[0]:
+            _local.connection.close()
+        _local.connection = sqlite3.connect(f"file:{key[1]}?mode=ro", uri=True)
+        _local.connection.row_factory = sqlite3.Row
+        _local.key = key
+    return _local.connection
+
+
+def _record(row):
+    # NULLs back to NaN and dates back to Timestamps, as in the pandas path
+    record = {}
+    for column in row.keys():
+        value = row[column]
+        if column in DATE_COLUMNS:
+            value = pd.NaT if value is None else pd.Timestamp(value)
+        elif value is None:
+            value = np.nan
+        record[column] = value
+    return record
+
+
+# --------------------------------------------------
+# Queries
+# --------------------------------------------------
+
+
+def latest_period():
+    return (
+        connection()
+        .execute("SELECT period FROM periods ORDER BY position DESC LIMIT 1")
+        .fetchone()[0]
+    )
+
+
+def metric_record(product, period=None):
+    # get_data: one indexed row of the metrics table
+    row = (
+        connection()
+        .execute(
+            "SELECT * FROM metrics WHERE Product = ? AND period = ?",
+            (product, period or latest_period()),
+        )
+        .fetchone()
+    )
+    if row is None:
+        raise KeyError(product)
+
+    record = _record(row)
+    del record["period"]
+    return record
+
+
+def current_record(product):
+    # update_table: the product's Sheet2 row
+    row = (
+        connection()
+        .execute("SELECT * FROM current_period WHERE Product = ?", (product,))
+        .fetchone()
+    )
+    if row is None:
+        raise KeyError(product)
+    return _record(row)
+
+
+def chart():
+    # create_figure: loss ratio (in %) per product and period, pivoted in
+    # the query, products in load order. Period names are only bound as
+    # parameters, never written into the SQL.
+    periods = [
+        row[0]
+        for row in connection().execute("SELECT period FROM periods ORDER BY position")
+    ]
+    columns = ", ".join(
+        "100 * MAX(CASE WHEN period = ? THEN value END)" for _ in periods
+    )
+    rows = connection().execute(
+        f"SELECT product AS Product, {columns} FROM experience "
+        "WHERE metric = 'Loss Ratio' GROUP BY product ORDER BY MIN(rowid)",
+        periods,
+    )
+    return pd.DataFrame(rows.fetchall(), columns=["Product"] + periods)
+
+
+@on_reload
+def build_reloaded_database(version):
+    # Write the reloaded data's database before it is swapped in, and drop
+    # those of older versions
+    if ENABLED:
+        ensure_database()
+        loaded_versions.append(version)
+        prune_databases()
+
+
+# Database of the data loaded at start
+if ENABLED:
+    ensure_database()
+    loaded_versions.append(data_store.data_version)
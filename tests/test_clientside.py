@@ -0,0 +1,71 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+from plotly.io.json import to_json_plotly
+
+import dashboard  # noqa: F401  (registers the pages)
+import data_store
+import fast_figures
+from pages import overview
+from test_fast_figures import spec
+
+# --------------------------------------------------
+# Clientside Figure Equivalence
+# --------------------------------------------------
+# The selected product's figures built by assets/main.js from the
+# product-metrics payload must match the server's fast figure builders.
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+
+RENDER = """
+const window = {};
+%s
+const [store, template] = JSON.parse(require("fs").readFileSync(0, "utf8"));
+const overview = window.dash_clientside.overview;
+const figures = {};
+for (const product of Object.keys(store.products)) {
+  const [, payload] = overview.selectProduct(product, store);
+  figures[product] = {
+    cards: overview.renderCards(payload, template),
+    boxes: overview.renderBoxes(payload, store, template),
+  };
+}
+console.log(JSON.stringify(figures));
+"""
+
+
+def render(store):
+    with open("assets/main.js") as file:
+        script = RENDER % file.read()
+    payload = to_json_plotly([store, fast_figures.DEFAULT_TEMPLATE])
+    result = subprocess.run(
+        ["node", "-e", script], input=payload, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout)
+
+
+@pytest.mark.parametrize("period", ["latest", "earliest"])
+def test_selected_figures(period):
+    periods = data_store.period_columns
+    period = periods[-1] if period == "latest" else periods[0]
+    store = overview.build_product_metrics(data_store.data_version, period)
+    figures = render(store)
+
+    for product, record in data_store.period_metrics(period).items():
+        payload = overview.selected_card_payload(record)
+        cards = [fast_figures.create_delta_card(*args) for args in payload["cards"]]
+        cards.append(fast_figures.create_bullet(payload["bullet"]))
+        boxes = [
+            fast_figures.create_box(record[column], metric)[0]
+            for column, metric in overview.SELECTED_BOXES
+        ]
+
+        assert [spec(figure) for figure in figures[product]["cards"]] == [
+            spec(figure) for figure in cards
+        ]
+        assert [spec(figure) for figure in figures[product]["boxes"]] == [
+            spec(figure) for figure in boxes
+        ]
@@ -0,0 +1,47 @@
+import pandas as pd
+
+import customer_store
+from generate_data import customer_chunks, write_customers
+
+# --------------------------------------------------
+# Customer Table Sources
+# --------------------------------------------------
+
+
+def test_parquet_customers(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.CACHE_DIR", str(tmp_path / "cache"))
+    path = str(tmp_path / "customers.parquet")
+    write_customers(path, customer_chunks(2_500, ["22Q1", "23Q1"], chunk_size=1_000))
+
+    table = customer_store.customer_table(path)
+    assert len(table) == 2_500
+    assert set(table.rider) <= {1.0, 2.0}
+    assert (
+        len(table.filter(ages=(30, 40)))
+        == ((table.age >= 30) & (table.age <= 40)).sum()
+    )
+
+    # Generated profiles carry dates within their study quarter
+    assert table.has_dates
+    quarters = pd.PeriodIndex(table.dates, freq="Q").astype(str)
+    assert set(quarters) == {"2022Q1", "2023Q1"}
+    assert (
+        len(table.filter(dates=("2023-01-01", "2023-03-31")))
+        == (quarters == "2023Q1").sum()
+    )
+
+
+def test_period_label_filter(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.CACHE_DIR", str(tmp_path / "cache"))
+    path = str(tmp_path / "customers.parquet")
+    frame = pd.concat(customer_chunks(3, ["22Q1"]))
+    frame["Date"] = ["Previous", "Current", "Current"]
+    frame["Age"] = [18, 64, 107]
+    frame.to_parquet(path)
+
+    table = customer_store.customer_table(path)
+    assert not table.has_dates
+    assert table.period_labels == ["Previous", "Current"]
+    assert table.age_range == (18, 107)
+    assert list(table.filter(periods=("Current",))) == [1, 2]
+    assert len(table.filter(periods=())) == 3
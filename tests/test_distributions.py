@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from distributions import build_distributions, rank_percentile
+from timeseries import PeriodStore
+
+# --------------------------------------------------
+# Peer Distributions
+# --------------------------------------------------
+
+
+def store():
+    # Three periods of two products and the portfolio total, whose changes
+    # would dominate the peers if they were counted
+    periods = PeriodStore()
+    for period, contribution, ratio in [
+        ("21Q1", [100.0, 200.0, 1e6], [0.5, 0.6, 0.9]),
+        ("22Q1", [110.0, 150.0, 2e6], [0.6, 0.6, 0.1]),
+        ("23Q1", [121.0, 150.0, 8e6], [0.4, 0.9, 0.9]),
+    ]:
+        periods.append(
+            period,
+            pd.DataFrame(
+                {
+                    "Product": ["Medi A", "Medi B", "All"],
+                    "Net Contribution": contribution,
+                    "Loss Ratio": ratio,
+                }
+            ),
+        )
+    return periods
+
+
+def test_peers_over_every_period():
+    distributions = build_distributions(store())
+
+    np.testing.assert_allclose(distributions["cont"]["values"], [-25, 0, 10, 10])
+    np.testing.assert_allclose(
+        distributions["lossRatio"]["values"], [-20, 0, 10, 30], atol=1e-9
+    )
+    assert distributions["cont"]["label"] == "Change (%)"
+    assert distributions["lossRatio"]["label"] == "Change (pts)"
+    assert rank_percentile(distributions["cont"], 10) == 50
+
+
+def test_metric_without_history():
+    distributions = build_distributions(store())
+    assert distributions["claim"]["values"].tolist() == [0.0]
+    assert np.isnan(rank_percentile(distributions["claim"], np.nan))
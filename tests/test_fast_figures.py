@@ -0,0 +1,154 @@
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from plotly.io.json import to_json_plotly
+
+import config
+import dashboard  # noqa: F401  (registers the pages)
+import data_store
+import fast_figures
+from pages import overview, product
+from projection import project_loss_ratio
+
+# --------------------------------------------------
+# Fast Figure Equivalence
+# --------------------------------------------------
+# Every fast_figures builder must emit the same figure spec as the
+# go.Figure factory it replaces.
+
+
+def _decode(node):
+    # Typed arrays back to plain lists and NaN to None, so both encodings
+    # compare by value
+    if isinstance(node, dict):
+        if set(node) == {"dtype", "bdata"}:
+            return _decode(
+                np.frombuffer(
+                    base64.b64decode(node["bdata"]), dtype=node["dtype"]
+                ).tolist()
+            )
+        return {key: _decode(value) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_decode(value) for value in node]
+    if isinstance(node, float) and np.isnan(node):
+        return None
+    return node
+
+
+def spec(figure):
+    if isinstance(figure, tuple):
+        figure = figure[0]
+    if hasattr(figure, "to_plotly_json"):
+        figure = figure.to_plotly_json()
+    return _decode(json.loads(to_json_plotly(figure)))
+
+
+@pytest.mark.parametrize(
+    "reference, fast, args",
+    [
+        (
+            overview.create_delta_card,
+            fast_figures.create_delta_card,
+            (93.8, 85.6, ".1f", "%", "outgo", "big"),
+        ),
+        (
+            overview.create_delta_card,
+            fast_figures.create_delta_card,
+            (7.41, 6.45, ".1f", "m", "income"),
+        ),
+        (overview.create_bullet, fast_figures.create_bullet, (0.938,)),
+        (overview.create_box, fast_figures.create_box, (8.2, "lossRatio")),
+        # A metric an earlier study period does not report
+        (overview.create_box, fast_figures.create_box, (np.nan, "lossRatio")),
+    ],
+    ids=["delta card outgo", "delta card income", "bullet", "box", "box nan"],
+)
+def test_figure(reference, fast, args):
+    assert spec(fast(*args)) == spec(reference(*args))
+
+
+def test_fan():
+    projection = project_loss_ratio("All", "test", 1_000, config.FAN_SEED)
+    assert spec(fast_figures.create_fan(projection)) == spec(
+        overview.create_fan(projection)
+    )
+
+
+# --------------------------------------------------
+# Line Graph
+# --------------------------------------------------
+
+
+def chart(n_products, periods=("21Q1", "22Q1", "Current"), seed=0):
+    # Loss ratio table shaped like data_store.data_chart
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(40, 120, (n_products + 1, len(periods)))
+    return (
+        pd.DataFrame(
+            values,
+            columns=list(periods),
+            index=["All"] + [f"P{i}" for i in range(n_products)],
+        )
+        .rename_axis("Product")
+        .reset_index()
+    )
+
+
+def line_graphs(monkeypatch, data_chart):
+    # The go.Figure path reads the loaded data; point it at data_chart
+    periods = [column for column in data_chart.columns if column != "Product"]
+    monkeypatch.setattr(product, "chart_data", lambda: data_chart)
+    monkeypatch.setattr(data_store, "period_columns", periods, raising=False)
+    return product.create_figure(), fast_figures.create_figure(data_chart)
+
+
+def test_line_graph():
+    assert spec(fast_figures.create_figure(data_store.data_chart)) == spec(
+        product.create_figure()
+    )
+
+
+def test_line_graph_nan_history(monkeypatch):
+    # Products launched after the first study period have no loss ratio there
+    data_chart = chart(5)
+    data_chart.loc[[2, 4], "21Q1"] = np.nan
+
+    reference, fast = line_graphs(monkeypatch, data_chart)
+    assert spec(fast) == spec(reference)
+    assert spec(fast)["data"][3]["y"][0] is None
+
+
+def test_line_graph_top_n(monkeypatch):
+    monkeypatch.setattr(config, "LINE_GRAPH_TOP_N", 3)
+    data_chart = chart(10)
+    data_chart.loc[5, "21Q1"] = np.nan
+
+    reference, fast = line_graphs(monkeypatch, data_chart)
+    assert spec(fast) == spec(reference)
+
+    # 'All', threshold, the top 3 products by latest loss ratio, then the
+    # band (lower, upper, median) of the other 7
+    names = [trace["name"] for trace in spec(fast)["data"]]
+    latest = data_chart.set_index("Product")["Current"].drop("All")
+    top = [name for name in latest.index if name in latest.nlargest(3).index]
+    assert names[2:5] == top
+    assert names[5:] == [
+        "Other 7 products",
+        "Other 7 products (P10-P90)",
+        "Other 7 products (median)",
+    ]
+
+
+def test_line_graph_webgl_threshold(monkeypatch):
+    monkeypatch.setattr(config, "LINE_GRAPH_WEBGL_THRESHOLD", 4)
+
+    reference, fast = line_graphs(monkeypatch, chart(4))
+    assert spec(fast) == spec(reference)
+    assert {trace["type"] for trace in spec(fast)["data"]} == {"scatter"}
+
+    reference, fast = line_graphs(monkeypatch, chart(5))
+    assert spec(fast) == spec(reference)
+    assert {trace["type"] for trace in spec(fast)["data"]} == {"scattergl"}
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+import ingest
+
+# --------------------------------------------------
+# Extract Ingestion
+# --------------------------------------------------
+
+
+@pytest.fixture
+def extracts(tmp_path):
+    # Partitions mixing "23Q1" labels, dates read as text and typed dates,
+    # within one file as well as across files
+    policies, claims = tmp_path / "policies", tmp_path / "claims"
+    policies.mkdir()
+    claims.mkdir()
+
+    pd.DataFrame(
+        {
+            "Product": ["Medi A", "Medi B", "Medi A"],
+            "Period": ["23Q1", "23Q1", "22Q4"],
+            "Contribution": [100.0, 50.0, 80.0],
+        }
+    ).to_csv(policies / "a.csv", index=False)
+    pd.DataFrame(
+        {
+            "Product": ["Medi A", "Medi B", "Medi A"],
+            "Period": ["2023-02-15", "23Q1", "2022-11-30"],
+            "Contribution": [10.0, 5.0, 8.0],
+        }
+    ).to_csv(policies / "b.csv", index=False)
+    pd.DataFrame(
+        {
+            "Product": ["Medi A", "Medi B"],
+            "Period": pd.to_datetime(["2023-03-31", "2022-10-01"]),
+            "Contribution": [1.0, 2.0],
+        }
+    ).to_parquet(policies / "c.parquet", row_group_size=1)
+
+    pd.DataFrame(
+        {
+            "Product": ["Medi A", "Medi B", "Medi A"],
+            "Period": ["23Q1", "2023-01-20", "22Q4"],
+            "Claim Amount": [60.0, 20.0, 40.0],
+        }
+    ).to_csv(claims / "a.csv", index=False)
+    return str(policies), str(claims)
+
+
+def test_mixed_period_formats(extracts):
+    policies, claims = extracts
+    sheets = ingest.ingest([policies], [claims], workers=1, chunk_size=2)
+
+    current = sheets["Sheet2"].set_index("Product")
+    assert current.loc["Medi A", "Net Contribution"] == 111
+    assert current.loc["Medi B", "Net Contribution"] == 55
+    assert current.loc["All", "Incurred Claim"] == 80
+    assert current.loc["Medi A", "Number of Lives"] == 3
+    assert sheets["Sheet3"].set_index("Product").loc["Medi B", "Net Contribution"] == 2
+    assert list(sheets["Sheet1"].columns) == ["Product", "22Q4", "Current"]
+
+
+def test_workers_agree(extracts):
+    policies, claims = extracts
+    serial = ingest.ingest([policies], [claims], workers=1, chunk_size=2)
+    parallel = ingest.ingest([policies], [claims], workers=2, chunk_size=2)
+    for name, sheet in serial.items():
+        pd.testing.assert_frame_equal(parallel[name], sheet)
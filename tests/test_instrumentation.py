@@ -0,0 +1,44 @@
+from collections import defaultdict
+
+import pytest
+
+import config
+import dashboard
+import instrumentation
+
+# --------------------------------------------------
+# Prometheus Exposition
+# --------------------------------------------------
+
+
+def test_label_values_escaped(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_counters", defaultdict(int))
+    instrumentation.increment(
+        "dashboard_cache_total", {"cache": 'C:\\figures "all"\nnext', "result": "hit"}
+    )
+
+    lines = instrumentation.render_metrics().splitlines()
+    assert (
+        'dashboard_cache_total{cache="C:\\\\figures \\"all\\"\\nnext",result="hit"} 1'
+        in lines
+    )
+
+
+@pytest.mark.parametrize(
+    "allow, address, headers, status",
+    [
+        (["127.0.0.1", "::1"], "127.0.0.1", {}, 200),
+        (["127.0.0.1", "::1"], "10.0.0.5", {}, 403),
+        # A reverse proxy on the same machine forwarding an outside client
+        (["127.0.0.1", "::1"], "127.0.0.1", {"X-Forwarded-For": "203.0.113.9"}, 403),
+        (["10.0.0.0/8"], "10.0.0.5", {}, 200),
+        ([], "203.0.113.9", {"X-Forwarded-For": "203.0.113.9"}, 200),
+    ],
+)
+def test_metrics_allow_list(monkeypatch, allow, address, headers, status):
+    monkeypatch.setattr(config, "METRICS_ALLOW", allow)
+    client = dashboard.app.server.test_client()
+    response = client.get(
+        "/metrics", headers=headers, environ_base={"REMOTE_ADDR": address}
+    )
+    assert response.status_code == status
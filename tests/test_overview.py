@@ -0,0 +1,58 @@
+from plotly.io.json import to_json_plotly
+
+import dashboard  # noqa: F401  (registers the pages)
+import data_store
+from generate_data import experience_sheets
+from pages import overview
+
+# --------------------------------------------------
+# Stale Browser State
+# --------------------------------------------------
+# A browser can still hold the data version and study period of the data
+# before a reload.
+
+
+def test_unknown_period_falls_back_to_latest():
+    latest = data_store.period_columns[-1]
+    assert overview.update_all_data("stale", "20Q4") == overview.update_all_data(
+        data_store.data_version, latest
+    )
+    assert overview.update_data("Medi A", "20Q4") == overview.update_data(
+        "Medi A", latest
+    )
+
+
+def test_panels_keyed_on_served_version():
+    overview.build_all_panel.cache_clear()
+    overview.update_all_data("stale", None)
+    overview.update_all_data("older", None)
+    assert overview.build_all_panel.cache_info().currsize == 1
+
+    payload = overview.build_product_metrics(
+        data_store.data_version, data_store.study_period()
+    )
+    assert payload["version"] == data_store.data_version
+
+
+# --------------------------------------------------
+# Product Metrics Payload
+# --------------------------------------------------
+
+
+def product_metrics_bytes(n_products, n_periods):
+    snapshot = data_store.build_snapshot(
+        experience_sheets(n_products, n_periods), f"payload-{n_products}-{n_periods}"
+    )
+    with data_store.pinned(snapshot):
+        payload = overview.build_product_metrics(
+            snapshot.data_version, snapshot.period_columns[-1]
+        )
+    return len(to_json_plotly(payload))
+
+
+def test_product_metrics_payload_size():
+    # A bounded row per product, whatever the length of the history behind
+    # the distributions
+    size = product_metrics_bytes(2_000, 3)
+    assert size < 2_000 * 400
+    assert product_metrics_bytes(2_000, 40) < size * 1.1
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+import customer_store
+from profile_clusters import ProfileClusters
+
+# --------------------------------------------------
+# Incremental Profile Clusters
+# --------------------------------------------------
+
+CENTERS = np.array([[10.0, 10.0], [50.0, 90.0], [90.0, 30.0]])
+
+
+def blobs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return CENTERS[rng.integers(0, len(CENTERS), n)] + rng.normal(0, 2, (n, 2))
+
+
+def clusters(values, **kwargs):
+    model = ProfileClusters(["x", "y"], [0, 0], [100, 100], n_clusters=3, **kwargs)
+    return model.update(values)
+
+
+def test_recovers_separated_clusters():
+    model = clusters(blobs(5_000), batch_size=256)
+    found = model.centroids()[np.argsort(model.centroids()[:, 0])]
+    np.testing.assert_allclose(found, CENTERS, atol=1.0)
+    assert model.count == 5_000
+
+
+def test_stable_across_runs():
+    values = blobs(3_000)
+    first, second = clusters(values), clusters(values)
+    np.testing.assert_array_equal(first.centers, second.centers)
+    np.testing.assert_array_equal(first.predict(values), second.predict(values))
+
+
+def test_incremental_updates_match_one_pass():
+    # Batches are cut the same way, so folding new profiles in later gives
+    # the same centroids as seeing them all at once
+    values = blobs(4_096)
+    whole = clusters(values, batch_size=512)
+    parts = clusters(values[:2_048], batch_size=512).update(values[2_048:])
+    np.testing.assert_allclose(parts.centers, whole.centers)
+    np.testing.assert_array_equal(parts.counts, whole.counts)
+
+
+def test_selection_regroups_without_refitting():
+    values = blobs(2_000)
+    model = clusters(values)
+    labels = model.predict(values)
+
+    everything = model.selection(values, labels)
+    np.testing.assert_array_equal(everything.counts, np.bincount(labels, minlength=3))
+
+    one = labels == labels[0]
+    selected = model.selection(values[one], labels[one])
+    assert selected.counts[labels[0]] == one.sum()
+    assert selected.counts.sum() == one.sum()
+    np.testing.assert_allclose(
+        selected.centroids()[labels[0]], values[one].mean(axis=0)
+    )
+
+
+def test_customer_table_fits_once():
+    rng = np.random.default_rng(0)
+    n = 1_000
+    customers = pd.DataFrame(
+        {
+            "Date": "Current",
+            "Age": rng.integers(18, 70, n),
+            "Gender": rng.integers(0, 2, n).astype("float64"),
+            "Sum Assured": rng.uniform(1e4, 5e4, n),
+            "Most Rider": rng.integers(1, 3, n).astype("float64"),
+        }
+    )
+    table = customer_store.CustomerTable(customers, "test")
+
+    young = table.clusters(table.filter(ages=(18, 30)))
+    model = table._clusters[0]
+    everyone = table.clusters(table.filter())
+    assert table._clusters[0] is model
+    assert young.counts.sum() == len(table.filter(ages=(18, 30)))
+    assert everyone.counts.sum() == n
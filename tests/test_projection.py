@@ -0,0 +1,116 @@
+import time
+import zlib
+
+import numpy as np
+
+import config
+import data_store
+import fast_figures
+import hot_reload
+from pages import overview
+from projection import (
+    FAN_PERCENTILES,
+    PORTFOLIO,
+    product_rng,
+    project_history,
+    projections_ready,
+    project_loss_ratio,
+    published_projection,
+    simulate_loss_ratio,
+    simulate_loss_ratio_sketch,
+)
+from projection_runner import refresh_projections
+from test_fast_figures import spec
+
+# --------------------------------------------------
+# Published Projections
+# --------------------------------------------------
+# Requests read projections from the batch only; until it is there the fan
+# chart shows the history alone.
+
+
+def test_pending_until_published(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path))
+    version, periods = data_store.data_version, data_store.period_columns
+
+    pending = published_projection(PORTFOLIO, version, n_sims=500)
+    assert not projections_ready(version, 500)
+    assert pending["bands"] is None
+    assert pending["history"] == [
+        data_store.records_chart[PORTFOLIO][period] for period in periods
+    ]
+
+    refresh_projections(version, n_sims=500, workers=1)
+    assert projections_ready(version, 500)
+
+    # Every study period of the dropdown has a published portfolio fan
+    for period in periods:
+        projection = published_projection(PORTFOLIO, version, period, n_sims=500)
+        assert projection == project_loss_ratio(
+            PORTFOLIO, version, 500, config.FAN_SEED, period
+        )
+    assert published_projection("Medi A", version, n_sims=500)["bands"] is not None
+
+
+def test_pending_fan():
+    projection = published_projection(PORTFOLIO, "unpublished")
+    figure = fast_figures.create_fan(projection)
+    assert len(figure["data"]) == 1
+    assert spec(figure) == spec(overview.create_fan(projection))
+
+
+def test_start_hooks_run_in_background(monkeypatch):
+    monkeypatch.setattr(hot_reload, "started", False)
+    monkeypatch.setattr(hot_reload, "start_hooks", [lambda: time.sleep(1)])
+    monkeypatch.setattr(config, "RELOAD_INTERVAL", 0)
+
+    start = time.perf_counter()
+    hot_reload.start()
+    assert time.perf_counter() - start < 0.5
+
+
+# --------------------------------------------------
+# Simulation
+# --------------------------------------------------
+
+HISTORY = [60.0, 65.0, 70.0]
+
+
+def test_sketch_bands_at_switch_over():
+    # At FAN_CHUNK_SIZE scenarios the exact percentiles are still used; the
+    # sketch taking over above it has to give the same bands
+    n_sims = config.FAN_CHUNK_SIZE
+    exact = simulate_loss_ratio(HISTORY, n_sims, product_rng("Medi A"))
+    digest, mean = simulate_loss_ratio_sketch(
+        HISTORY,
+        n_sims,
+        product_rng("Medi A"),
+        n_sims // 10,
+        config.FAN_SKETCH_COMPRESSION,
+    )
+
+    # Chunked draws follow the same stream, so min, max and mean agree
+    bands = digest.percentile(FAN_PERCENTILES)
+    expected = np.percentile(exact, FAN_PERCENTILES)
+    assert abs(mean - exact.mean()) < 1e-9
+    assert bands[[0, -1]].tolist() == expected[[0, -1]].tolist()
+
+    ranks = np.searchsorted(np.sort(exact), bands) / n_sims
+    assert np.abs(ranks - np.array(FAN_PERCENTILES) / 100).max() < 1e-3
+
+    below = project_history("Medi A", HISTORY, n_sims, config.FAN_SEED)
+    above = project_history("Medi A", HISTORY, n_sims + 1, config.FAN_SEED)
+    np.testing.assert_allclose(above["bands"], below["bands"], atol=0.01)
+
+
+def test_product_streams_are_deterministic():
+    # One stream per (seed, product), whatever order or process runs it
+    rng = np.random.default_rng([config.FAN_SEED, zlib.crc32(b"Medi A")])
+    assert (product_rng("Medi A").random(5) == rng.random(5)).all()
+    assert product_rng("Medi A").random() != product_rng("Medi B").random()
+    assert product_rng("Medi A", 1).random() != product_rng("Medi A", 2).random()
+
+    first = [project_history(p, HISTORY, 1_000, 7) for p in ["Medi A", "Medi B"]]
+    second = [project_history(p, HISTORY, 1_000, 7) for p in ["Medi B", "Medi A"]]
+    assert first == second[::-1]
+    assert first[0] != first[1]
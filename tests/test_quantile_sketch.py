@@ -0,0 +1,40 @@
+import numpy as np
+
+from quantile_sketch import TDigest
+
+# --------------------------------------------------
+# Quantile Sketch
+# --------------------------------------------------
+
+
+def rank_error(values, estimates, percentiles):
+    # Distance, in quantile terms, between each estimate's rank among the
+    # exact values and the percentile asked for
+    ranks = np.searchsorted(np.sort(values), estimates) / len(values)
+    return np.abs(ranks - np.asarray(percentiles) / 100)
+
+
+def test_tail_accuracy():
+    values = np.random.default_rng(0).lognormal(0, 1, 200_000)
+    percentiles = [0.1, 1, 5, 25, 50, 75, 95, 99, 99.9]
+    digest = TDigest(200).update(values)
+
+    assert rank_error(values, digest.percentile(percentiles), percentiles).max() < 1e-3
+    assert digest.percentile([0, 100]).tolist() == [values.min(), values.max()]
+    assert len(digest.means) <= 200
+
+
+def test_merge_matches_single_pass():
+    values = np.random.default_rng(1).normal(70, 5, 100_000)
+    percentiles = [1, 25, 50, 75, 99]
+
+    merged = TDigest(200)
+    for chunk in np.array_split(values, 7):
+        merged.merge(TDigest(200).update(chunk))
+
+    assert merged.count == len(values)
+    # Centroids near the median span up to ~pi / compression of the mass
+    errors = rank_error(values, merged.percentile(percentiles), percentiles)
+    assert errors.max() < np.pi / 200 / 2
+    assert errors[[0, -1]].max() < 1e-3
+    assert np.isnan(TDigest().percentile(50))
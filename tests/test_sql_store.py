@@ -0,0 +1,43 @@
+import os
+
+import pandas as pd
+
+import config
+import data_store
+import sql_store
+from generate_data import experience_sheets
+
+# --------------------------------------------------
+# SQLite Query Backend
+# --------------------------------------------------
+
+
+def test_chart_with_quoted_period(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path))
+    sheets = experience_sheets(5, 3)
+    sheets["Sheet1"].columns = ["Product", '21"Q1', "22Q1'", "Current"]
+    snapshot = data_store.build_snapshot(sheets, "ab" * 8)
+
+    with data_store.pinned(snapshot):
+        sql_store.ensure_database()
+        pd.testing.assert_frame_equal(
+            sql_store.chart(), snapshot.data_chart, check_dtype=False
+        )
+
+
+def test_prune_keeps_served_and_recent_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path))
+    served = data_store.published().data_version
+    versions = [f"{i:016x}" for i in range(4)]
+    monkeypatch.setattr(sql_store, "loaded_versions", [served] + versions)
+
+    names = [f"{version}.sqlite" for version in [served] + versions]
+    names += ["bench-1000-0.sqlite", "notes.txt"]
+    for name in names:
+        (tmp_path / name).touch()
+
+    sql_store.prune_databases(keep=2)
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [f"{served}.sqlite", f"{versions[2]}.sqlite", f"{versions[3]}.sqlite"]
+        + ["bench-1000-0.sqlite", "notes.txt"]
+    )
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from timeseries import PeriodStore, period_labels, quarter_number, study_quarter
+
+# --------------------------------------------------
+# Period Store
+# --------------------------------------------------
+
+
+def frame(**columns):
+    return pd.DataFrame(columns).rename(columns={"product": "Product"})
+
+
+def test_append_existing_period_merges():
+    store = PeriodStore()
+    store.append("22Q1", frame(product=["All", "Medi A"], claim=[10.0, 4.0]))
+    store.append(
+        "22Q1",
+        frame(
+            product=["All", "Medi A", "Medi B"],
+            claim=[float("nan"), 5.0, 6.0],
+            lives=[5, 2, 3],
+        ),
+    )
+
+    # New values win; a value the new table leaves out is kept
+    assert store.periods == ["22Q1"]
+    wide = store.slice("22Q1")
+    assert wide["claim"].tolist() == [10.0, 5.0, 6.0]
+    assert wide["lives"].tolist() == [5.0, 2.0, 3.0]
+    assert len(store.long("22Q1")) == 6
+
+
+def test_merge_keeps_first_seen_order():
+    store = PeriodStore()
+    store.append("22Q1", frame(product=["Medi B", "All"], cont=[1.0, 2.0]))
+    store.append("23Q1", frame(product=["Medi C", "Medi B"], claim=[3.0, 4.0]))
+    store.append(
+        "22Q1",
+        frame(product=["Medi D", "All", "Medi A"], lives=[1, 2, 3], cont=[5, 6, 7]),
+    )
+
+    # Periods, metrics and a merged period's products in first-seen order
+    assert store.periods == ["22Q1", "23Q1"]
+    assert store.metrics == ["cont", "claim", "lives"]
+    wide = store.slice("22Q1")
+    assert wide.index.tolist() == ["Medi B", "All", "Medi D", "Medi A"]
+    assert wide.columns.tolist() == ["cont", "claim", "lives"]
+    assert wide["cont"].tolist() == [1.0, 6.0, 5.0, 7.0]
+
+    # Slicing the later period picks up metrics it does not report
+    assert store.slice("23Q1").columns.tolist() == ["cont", "claim", "lives"]
+    assert store.slice("23Q1")["cont"].isna().all()
+
+
+def test_panel_round_trip():
+    tables = {
+        "21Q1": frame(product=["All", "Medi A"], claim=[1.0, 2.0], cont=[3.0, 4.0]),
+        "22Q1": frame(product=["All", "Medi B"], claim=[5.0, 6.0], cont=[7.0, 8.0]),
+    }
+    store = PeriodStore()
+    for period, table in tables.items():
+        store.append(period, table)
+
+    # One metric across periods, oldest first, back to the appended values
+    panel = store.panel("claim")
+    assert panel.columns.tolist() == ["21Q1", "22Q1"]
+    for period, table in tables.items():
+        values = panel[period].dropna()
+        assert values.to_dict() == table.set_index("Product")["claim"].to_dict()
+
+    # The long rows pivot back to each period's slice
+    table = store.long()
+    assert table["Period"].cat.categories.tolist() == ["21Q1", "22Q1"]
+    for period in store.periods:
+        rows = table[table["Period"] == period]
+        wide = rows.pivot(index="Product", columns="Metric", values="Value")
+        expected = store.slice(period)
+        np.testing.assert_array_equal(
+            wide.loc[expected.index, expected.columns].to_numpy(), expected.to_numpy()
+        )
+
+    # Appending to a copy rebuilds its panels and leaves the original intact
+    copy = store.copy()
+    copy.append("23Q1", frame(product=["All"], claim=[9.0]))
+    assert copy.panel("claim").columns.tolist() == ["21Q1", "22Q1", "23Q1"]
+    assert store.panel("claim").columns.tolist() == ["21Q1", "22Q1"]
+
+
+# --------------------------------------------------
+# Study Period Labels
+# --------------------------------------------------
+
+
+@pytest.mark.parametrize("header", ["23Q1", "2023Q1", "2023 Q1"])
+def test_quarter_headers(header):
+    assert quarter_number(header) == 2023 * 4
+
+
+def test_current_from_spacing():
+    labels = period_labels(["21Q1", "22Q1", "Current"])
+    assert labels == {"21Q1": "2021 Q1", "22Q1": "2022 Q1", "Current": "2023 Q1"}
+
+
+def test_current_from_study_month():
+    table = pd.DataFrame(
+        {
+            "Product": ["All", "Medi A", "Medi B", "Medi C"],
+            "Last Reprice Date": pd.to_datetime(
+                ["2023-07-30", "2022-06-20", "2023-07-30", None]
+            ),
+            "Mths Since Reprice": [8.0, 22.0, 8.0, None],
+        }
+    )
+    study = study_quarter(table)
+    assert period_labels(["21Q1", "22Q1", "Current"], study)["Current"] == "2024 Q1"
+
+    # A study month before the labelled quarters falls back to their spacing
+    assert period_labels(["24Q1", "25Q1", "Current"], study)["Current"] == "2026 Q1"
+
+
+def test_unlabelled_history():
+    assert period_labels(["Previous", "Current"]) == {
+        "Previous": "Previous",
+        "Current": "Current",
+    }
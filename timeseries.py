@@ -0,0 +1,187 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# Long-format Period Store
+# --------------------------------------------------
+# Experience figures as (product, period, metric) rows, one block per study
+# period. Each block also keeps a wide product x metric view, so slicing a
+# period is a dict lookup, and a new quarter is appended without touching the
+# blocks already held.
+
+
+class PeriodStore:
+    def __init__(self):
+        self.periods = []  # Study periods, oldest first
+        self.metrics = []  # Every metric seen so far, in first-seen order
+        self._blocks = {}  # period -> long frame (Product, Metric, Value)
+        self._wide = {}  # period -> Product x metric frame
+        self._panels = {}  # metric -> Product x period frame, built on demand
+
+    def copy(self):
+        # New store sharing the existing period blocks, which are never
+        # modified in place, so appending to the copy leaves this one intact
+        store = PeriodStore()
+        store.periods = list(self.periods)
+        store.metrics = list(self.metrics)
+        store._blocks = dict(self._blocks)
+        store._wide = dict(self._wide)
+        return store
+
+    def append(self, period, frame):
+        # Numeric columns of a per-product table (Product column plus one
+        # column per metric). Appending to a known period merges into it, the
+        # new values taking precedence.
+        wide = frame.set_index("Product").select_dtypes("number").astype("float64")
+        wide.columns.name = "Metric"
+
+        if period in self._wide:
+            wide = self._merge(self._wide[period], wide)
+        else:
+            self.periods.append(period)
+
+        self.metrics += [
+            metric for metric in wide.columns if metric not in self.metrics
+        ]
+
+        self._wide[period] = wide
+        self._blocks[period] = self._melt(wide)
+        self._panels.clear()
+
+    @staticmethod
+    def _melt(wide):
+        # Long rows, metric by metric, straight from the wide block's array;
+        # product and metric names are categorical codes into the block's axes
+        n_products, n_metrics = wide.shape
+        return pd.DataFrame(
+            {
+                "Product": pd.Categorical.from_codes(
+                    np.tile(np.arange(n_products), n_metrics), wide.index
+                ),
+                "Metric": pd.Categorical.from_codes(
+                    np.repeat(np.arange(n_metrics), n_products), wide.columns
+                ),
+                "Value": wide.to_numpy().ravel(order="F"),
+            }
+        )
+
+    @staticmethod
+    def _merge(old, new):
+        # Union of products and metrics in first-seen order
+        index = old.index.append(new.index.difference(old.index, sort=False))
+        columns = old.columns.append(new.columns.difference(old.columns, sort=False))
+        merged = old.reindex(index=index, columns=columns)
+        merged.update(new)
+        return merged
+
+    def previous(self, period):
+        position = self.periods.index(period)
+        return self.periods[position - 1] if position > 0 else None
+
+    def slice(self, period):
+        # Product x metric view of one period; metrics the period does not
+        # report are NaN
+        wide = self._wide[period]
+        if len(wide.columns) != len(self.metrics):
+            wide = self._wide[period] = wide.reindex(columns=self.metrics)
+        return wide
+
+    def long(self, period=None):
+        # The (product, metric, value) rows of one period, or every period
+        # with a Period column
+        if period is not None:
+            return self._blocks[period]
+
+        blocks = [self._blocks[period] for period in self.periods]
+        table = pd.concat(blocks, ignore_index=True)
+        table.insert(
+            0,
+            "Period",
+            pd.Categorical(
+                np.repeat(self.periods, [len(block) for block in blocks]),
+                categories=self.periods,
+                ordered=True,
+            ),
+        )
+        return table
+
+    def panel(self, metric):
+        # One metric across every period (columns, oldest first); rebuilt
+        # only after an append
+        panel = self._panels.get(metric)
+        if panel is None:
+            panel = pd.concat(
+                [self.slice(period)[metric] for period in self.periods],
+                axis=1,
+                keys=self.periods,
+            )
+            panel.index.name = "Product"
+            self._panels[metric] = panel
+        return panel
+
+
+# --------------------------------------------------
+# Study Period Labels
+# --------------------------------------------------
+# Period headers are quarters ("21Q1", "2021Q1", "2021 Q1"), except the
+# workbook's latest one, which is headed "Current". Its quarter is taken from
+# the data: the study month the repricing columns imply if there is one,
+# otherwise the labelled quarters before it continued at their own spacing.
+
+QUARTER_HEADER = re.compile(r"(\d{2}|\d{4})\s*Q([1-4])")
+
+
+def quarter_number(period):
+    # Quarters since year 0, or None for headers that are not quarters
+    match = QUARTER_HEADER.fullmatch(str(period).strip())
+    if match is None:
+        return None
+    year = int(match.group(1))
+    return (year if year >= 100 else 2000 + year) * 4 + int(match.group(2)) - 1
+
+
+def study_quarter(data_table):
+    # Quarter number of the study month implied by Last Reprice Date plus
+    # Mths Since Reprice (the middle one over the products that report both)
+    if not {"Last Reprice Date", "Mths Since Reprice"} <= set(data_table.columns):
+        return None
+
+    dates = pd.to_datetime(data_table["Last Reprice Date"], errors="coerce")
+    months = pd.to_numeric(data_table["Mths Since Reprice"], errors="coerce")
+    known = dates.notna().to_numpy() & months.notna().to_numpy()
+    if not known.any():
+        return None
+
+    study = np.sort(
+        dates.to_numpy()[known].astype("datetime64[M]").astype("int64")
+        + months.to_numpy()[known].astype("int64")
+    )[known.sum() // 2]
+    # Months since 1970-01
+    return (1970 + study // 12) * 4 + study % 12 // 3
+
+
+def period_labels(periods, study=None):
+    # period -> "2021 Q1" style label, in the order of periods (oldest first)
+    numbers = [quarter_number(period) for period in periods]
+    for i, number in enumerate(numbers):
+        if number is not None:
+            continue
+        known = [n for n in numbers[:i] if n is not None]
+        # A study month at or before a labelled quarter is not trusted
+        if (
+            i == len(numbers) - 1
+            and study is not None
+            and study > max(known, default=-1)
+        ):
+            numbers[i] = study
+        elif len(known) >= 2:
+            numbers[i] = known[-1] + known[-1] - known[-2]
+        elif known:
+            numbers[i] = known[-1] + 1
+
+    return {
+        period: str(period) if number is None else f"{number // 4} Q{number % 4 + 1}"
+        for period, number in zip(periods, numbers)
+    }
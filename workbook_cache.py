@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+import config
+
+# --------------------------------------------------
+# Workbook Cache
+# --------------------------------------------------
+# The workbook is parsed once per content version. Each sheet is then saved as
+# a Parquet file keyed on the workbook's content hash, so later starts (and
+# every other worker) load the columnar copy instead of re-parsing the XLSX.
+# Importing this module reads nothing.
+
+WORKBOOK_SHEETS = ["Sheet1", "Sheet2", "Sheet3"]
+
+
+def content_hash(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def workbook_digest(path):
+    # The manifest remembers the hash for the last seen mtime/size, so an
+    # unchanged workbook is not re-hashed on every start. It is keyed on the
+    # absolute path, so same-named workbooks in other folders keep their own.
+    stat = os.stat(path)
+    path_key = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:12]
+    manifest_path = os.path.join(
+        config.CACHE_DIR, f"{os.path.basename(path)}-{path_key}.manifest.json"
+    )
+
+    try:
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+        if (
+            manifest["mtime_ns"] == stat.st_mtime_ns
+            and manifest["size"] == stat.st_size
+        ):
+            return manifest["sha256"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    digest = content_hash(path)
+    manifest = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest}
+
+    try:
+        os.makedirs(config.CACHE_DIR, exist_ok=True)
+        atomic_write(manifest_path, lambda tmp: _write_json(tmp, manifest))
+    except OSError:
+        pass  # Read-only deployments simply re-hash on each start
+
+    return digest
+
+
+def _write_json(path, payload):
+    with open(path, "w") as file:
+        json.dump(payload, file)
+
+
+def _cache_path(digest, sheet):
+    return os.path.join(config.CACHE_DIR, f"{digest[:16]}-{sheet}.parquet")
+
+
+def atomic_write(path, write):
+    # Write to a temporary file first so concurrent workers never see a
+    # half-written cache file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_workbook(path=config.DATA_FILE, sheets=WORKBOOK_SHEETS):
+    digest = workbook_digest(path)
+    cache_paths = {sheet: _cache_path(digest, sheet) for sheet in sheets}
+
+    # Fast path: columnar copy of this exact workbook content already exists
+    if all(os.path.exists(cache_path) for cache_path in cache_paths.values()):
+        try:
+            frames = {
+                sheet: pd.read_parquet(cache_path)
+                for sheet, cache_path in cache_paths.items()
+            }
+            return frames, digest[:16]
+        except (ImportError, ValueError, OSError):
+            pass  # Unreadable cache (or no Parquet engine), fall back to XLSX
+
+    # Slow path: parse every sheet in a single pass over the workbook
+    frames = pd.read_excel(path, sheet_name=sheets)
+
+    try:
+        os.makedirs(config.CACHE_DIR, exist_ok=True)
+        for sheet, frame in frames.items():
+            atomic_write(cache_paths[sheet], frame.to_parquet)
+    except (ImportError, ValueError, TypeError, OSError):
+        pass  # Sheets with mixed-type columns (or no Parquet engine) stay uncached
+
+    # The short content hash doubles as the data version used by the caches
+    return frames, digest[:16]